@@ -1,55 +1,354 @@
 #api.py
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
+from flask.json.provider import JSONProvider
 import re
+import heapq
+import hashlib
+from operator import itemgetter
+from functools import wraps
 import logging
-import pandas as pd
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+import orjson
+from cachetools import TTLCache
+import numpy as np
 from datetime import datetime
-import time
 import os
 from dotenv import load_dotenv
 from flask_cors import CORS
 
 # Import the utility functions
-from utils.youtube_api import fetch_comments, extract_video_statistics
-from utils.sentiment import analyze_sentiment, get_sentiment_emoji
-from utils.topic_analysis import extract_topics, generate_content_ideas, extract_keywords
+from utils.youtube_api import iter_comment_pages, extract_video_statistics, extract_video_id
+from utils.sentiment import SENTIMENT_LABELS, batch_analyze_sentiments, batch_sentiment_codes, get_sentiment_emoji
+from utils.topic_analysis import analyze_text_bundle
 
 # Load environment variables
 load_dotenv()
 
+# Resolve the API key once at startup; restart the server after changing it
+_API_KEY = os.getenv('YOUTUBE_API_KEY', '')
+_API_CONFIGURED = bool(_API_KEY) and _API_KEY != 'YOUR_API_KEY'
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Emoji and display name per sentiment label, looked up once instead of per comment
+_EMOJI = {label: get_sentiment_emoji(label) for label in SENTIMENT_LABELS}
+_SENT_NAMES = {label: label.capitalize() for label in SENTIMENT_LABELS}
+
+# Upper bound for an explicit max_comments, to bound memory and API quota per request
+MAX_COMMENTS_CAP = int(os.getenv('MAX_COMMENTS_CAP', 5000))
+
+# Recently fetched YouTube data, so refreshing the same video skips the API round trips
+# (comments are stored serialized so every request gets its own copy to annotate)
+CACHE_TTL_SECONDS = int(os.getenv('API_CACHE_TTL', 600))
+_STATS_CACHE = TTLCache(maxsize=1024, ttl=CACHE_TTL_SECONDS)
+_COMMENTS_CACHE = TTLCache(maxsize=128, ttl=CACHE_TTL_SECONDS)
+_TEXT_BUNDLE_CACHE = TTLCache(maxsize=128, ttl=CACHE_TTL_SECONDS)
+_CACHE_LOCK = threading.Lock()
+
+# Statistics requests in progress per video ID, so concurrent misses (e.g. /api/video-info
+# and /api/analyze sent together by a frontend) share one YouTube API call
+_STATS_IN_FLIGHT = {}
+
+# Shared pool for overlapping independent YouTube API calls within a request
+_EXECUTOR = ThreadPoolExecutor(max_workers=16)
+
+# Scores fetched comment pages while the next page downloads; separate from _EXECUTOR
+# because fetch_all_comments (itself running there) waits on these tasks
+_SCORING_EXECUTOR = ThreadPoolExecutor(max_workers=4)
+
+# Serialization options shared by jsonify and the hand-built responses below
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson, so every jsonify() call uses it"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=_ORJSON_OPTIONS).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, option=_ORJSON_OPTIONS), mimetype='application/json')
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 # Enable CORS to allow requests from frontend
 CORS(app)
 
-# Function to extract YouTube video ID
-def extract_video_id(url):
-    """Extract the YouTube video ID from various URL formats"""
-    if not url:
+def format_sentiment(sentiment_counts, sentiment_percentages):
+    """Build the chart-ready sentiment list (one entry per label, positive first)"""
+    return [
+        {'name': _SENT_NAMES[label], 'value': sentiment_counts[label], 'percentage': sentiment_percentages[label], 'emoji': _EMOJI[label]}
+        for label in SENTIMENT_LABELS
+    ]
+
+def sentiment_breakdown(sentiment_codes):
+    """
+    Count sentiment codes and convert the counts to whole percentages
+    
+    Args:
+        sentiment_codes (np.ndarray): Codes from batch_sentiment_codes
+        
+    Returns:
+        tuple: (counts, percentages) dictionaries keyed by sentiment label
+    """
+    counts = np.bincount(sentiment_codes, minlength=3)
+    total = counts.sum()
+    # np.round rounds halves to even, like the built-in round
+    percentages = np.round(counts / total * 100).astype(int) if total else np.zeros(3, dtype=int)
+    return dict(zip(SENTIMENT_LABELS, counts.tolist())), dict(zip(SENTIMENT_LABELS, percentages.tolist()))
+
+def etag_json_response(payload, volatile_keys=()):
+    """
+    Serialize a response with an ETag so unchanged polls get 304 Not Modified
+    
+    The ETag hashes everything except volatile_keys (such as a per-request
+    timestamp), so it stays stable while the cached YouTube data is reused.
+    
+    Args:
+        payload (dict): Response payload
+        volatile_keys (tuple): Keys left out of the ETag (appended to the body as-is)
+        
+    Returns:
+        Response: JSON response, or an empty 304 if the client's If-None-Match matches
+    """
+    stable = orjson.dumps({key: value for key, value in payload.items() if key not in volatile_keys}, option=_ORJSON_OPTIONS)
+    body = stable
+    volatile = {key: payload[key] for key in volatile_keys if key in payload}
+    if volatile:
+        body = stable[:-1] + (b',' if len(stable) > 2 else b'') + orjson.dumps(volatile, option=_ORJSON_OPTIONS)[1:]
+    
+    response = Response(body, mimetype='application/json')
+    response.set_etag(hashlib.blake2b(stable, digest_size=8).hexdigest())
+    response.headers['Cache-Control'] = 'private, max-age=300'
+    return response.make_conditional(request)
+
+def streamed_json_response(payload, list_key, chunk_size=500):
+    """
+    Serialize a response whose payload[list_key] holds a long list (e.g. all comments)
+    
+    The envelope is written first and the list follows in chunks of chunk_size
+    items, so the full body never has to exist as one bytes object.
+    
+    Args:
+        payload (dict): Response payload
+        list_key (str): Key of the list to stream (moved to the end of the object)
+        chunk_size (int): Number of list items serialized per chunk
+        
+    Returns:
+        Response: Streaming JSON response
+    """
+    items = payload[list_key]
+    envelope = orjson.dumps({key: value for key, value in payload.items() if key != list_key}, option=_ORJSON_OPTIONS)
+    
+    def generate():
+        # '{...}' -> '{...,"list_key":[' then the items, then ']}'
+        yield envelope[:-1] + (b',' if len(envelope) > 2 else b'') + orjson.dumps(list_key) + b':['
+        for start in range(0, len(items), chunk_size):
+            chunk = orjson.dumps(items[start:start + chunk_size], option=_ORJSON_OPTIONS)
+            yield (b',' if start else b'') + chunk[1:-1]
+        yield b']}'
+    
+    return Response(generate(), mimetype='application/json')
+
+def parse_max_comments(value):
+    """
+    Parse the max_comments query parameter
+    
+    Args:
+        value (str): Raw query parameter value, or None if not given
+        
+    Returns:
+        int or None: Number of comments to fetch, capped at MAX_COMMENTS_CAP, or None to fetch all
+        
+    Raises:
+        ValueError: If the value is not a number or is below 1
+    """
+    if not value:
         return None
+    max_comments = int(value)
+    if max_comments < 1:
+        raise ValueError(f"max_comments must be at least 1, got {max_comments}")
+    return min(max_comments, MAX_COMMENTS_CAP)
+
+def wants_refresh():
+    """Whether the request asked to bypass the cache with ?refresh=1"""
+    return request.args.get('refresh', '').lower() in ('1', 'true', 'yes')
+
+def require_video_id(check_api_key=False, required_params=None):
+    """
+    Validate the url and max_comments query parameters before calling an endpoint
+    
+    The decorated view is called as f(video_id, max_comments). Checks run in this
+    order and the first failure is returned: the API key (503, if check_api_key),
+    url, each of required_params, max_comments, then the video ID in url (all 400).
+    
+    Args:
+        check_api_key (bool): Answer 503 first when no API key is configured
+        required_params (dict, optional): Extra required query parameter -> error message
         
-    patterns = [
-        r'(?:youtube\.com\/(?:[^\/\n\s]+\/\S+\/|(?:v|e(?:mbed)?)\/|\S*?[?&]v=)|youtu\.be\/)([a-zA-Z0-9_-]{11})',
-        r'(?:youtube\.com\/shorts\/)([a-zA-Z0-9_-]{11})',
-        r'(?:youtube\.com\/live\/)([a-zA-Z0-9_-]{11})'
-    ]
+    Returns:
+        callable: Decorator for a view function taking (video_id, max_comments)
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper():
+            # Check if API key is configured
+            if check_api_key and not _API_CONFIGURED:
+                return jsonify({'error': 'YouTube API key not configured. Please set YOUTUBE_API_KEY environment variable.'}), 503
+            
+            video_url = request.args.get('url')
+            if not video_url:
+                return jsonify({'error': 'No URL provided'}), 400
+            
+            for name, message in (required_params or {}).items():
+                if not request.args.get(name):
+                    return jsonify({'error': message}), 400
+            
+            try:
+                max_comments = parse_max_comments(request.args.get('max_comments'))
+            except ValueError:
+                return jsonify({'error': 'max_comments must be a positive number'}), 400
+            
+            video_id = extract_video_id(video_url)
+            if not video_id:
+                return jsonify({'error': 'Invalid YouTube URL. Please provide a valid YouTube URL or video ID.'}), 400
+            
+            return f(video_id, max_comments)
+        
+        return wrapper
     
-    for pattern in patterns:
-        match = re.search(pattern, url)
-        if match:
-            return match.group(1)
+    return decorator
+
+def get_video_statistics(video_id, refresh=False):
+    """
+    Fetch video statistics, reusing a result cached in the last CACHE_TTL_SECONDS
+    Concurrent calls for the same video wait for a single API request.
     
-    # Check if the input is directly a video ID (11 characters)
-    if re.match(r'^[a-zA-Z0-9_-]{11}$', url):
-        return url
+    Args:
+        video_id (str): YouTube video ID
+        refresh (bool): Skip the cache and fetch fresh statistics
         
-    return None
+    Returns:
+        dict: Video statistics (a copy the caller may modify)
+    """
+    with _CACHE_LOCK:
+        cached = None if refresh else _STATS_CACHE.get(video_id)
+        if cached is not None:
+            return dict(cached)
+        
+        # Join a request already in progress for this video instead of starting another
+        pending = _STATS_IN_FLIGHT.get(video_id)
+        if pending is None:
+            pending = _STATS_IN_FLIGHT[video_id] = Future()
+            is_owner = True
+        else:
+            is_owner = False
+    
+    if is_owner:
+        try:
+            video_stats = extract_video_statistics(video_id)
+            if video_stats:
+                with _CACHE_LOCK:
+                    _STATS_CACHE[video_id] = video_stats
+            pending.set_result(video_stats)
+        except Exception as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with _CACHE_LOCK:
+                _STATS_IN_FLIGHT.pop(video_id, None)
+    
+    video_stats = pending.result()
+    return dict(video_stats) if video_stats else video_stats
+
+def get_text_bundle(video_id, max_results, comments):
+    """
+    Topic, content idea and keyword analysis for a fetch_all_comments result
+    
+    The bundle is cached under the same (video_id, max_results) key as the comments,
+    so /api/topics after /api/analyze (or vice versa) reuses it.
+    
+    Args:
+        video_id (str): YouTube video ID
+        max_results (int, optional): max_results the comments were fetched with
+        comments (list): List of comment dictionaries
+        
+    Returns:
+        dict: Dictionary with 'topics', 'ideas' and 'keywords' results
+    """
+    cache_key = (video_id, max_results)
+    with _CACHE_LOCK:
+        bundle = _TEXT_BUNDLE_CACHE.get(cache_key)
+    
+    if bundle is None:
+        bundle = analyze_text_bundle(comments, top_n_keywords=20)
+        with _CACHE_LOCK:
+            _TEXT_BUNDLE_CACHE[cache_key] = bundle
+    
+    return bundle
 
 # Function to fetch all comments with pagination
-def fetch_all_comments(video_id, max_results=None):
+def _score_page(page_comments):
+    """Batch-score one page so its sentiment codes are cached before the endpoint asks"""
+    batch_sentiment_codes([comment['text'] for comment in page_comments])
+
+def iter_comments(video_id, max_results=None, refresh=False):
+    """
+    Yield a video's comments page by page, as each page is fetched
+    Complete results are cached for CACHE_TTL_SECONDS per (video_id, max_results);
+    a cached result is yielded as a single page.
+    
+    Args:
+        video_id (str): YouTube video ID
+        max_results (int, optional): Maximum number of comments to fetch. If None, fetches all.
+        refresh (bool): Skip the cache and fetch fresh comments
+        
+    Yields:
+        list: List of comment dictionaries for each page
+        
+    Raises:
+        ValueError: If API key is not configured or API request fails
+    """
+    cache_key = (video_id, max_results)
+    if not refresh:
+        with _CACHE_LOCK:
+            cached = _COMMENTS_CACHE.get(cache_key)
+        if cached is not None:
+            logger.info(f"Using cached comments for video ID: {video_id}")
+            yield orjson.loads(cached)
+            return
+    
+    # Pages are kept serialized for the cache so the dicts can be released per page
+    serialized_pages = []
+    fetched = 0
+    
+    # Each page is parsed while the next one is already being requested
+    for page_comments in iter_comment_pages(video_id, max_results):
+        if max_results is not None:
+            page_comments = page_comments[:max_results - fetched]  # Trim to exact count
+        fetched += len(page_comments)
+        serialized_pages.append(orjson.dumps(page_comments)[1:-1])
+        
+        yield page_comments
+        
+        # Check if we need to stop based on max_results
+        if max_results is not None and fetched >= max_results:
+            logger.info(f"Reached requested maximum of {max_results} comments")
+            break
+    
+    # Only complete results are cached; partial ones are retried next time.
+    # Text analysis derived from older comments for this key is dropped with them.
+    with _CACHE_LOCK:
+        _COMMENTS_CACHE[cache_key] = b'[' + b','.join(serialized_pages) + b']'
+        _TEXT_BUNDLE_CACHE.pop(cache_key, None)
+
+def fetch_all_comments(video_id, max_results=None, refresh=False, score_sentiment=False):
     """
     Fetch all comments from a YouTube video using pagination
     Requires a valid YouTube API key to be set in environment variables.
@@ -57,6 +356,9 @@ def fetch_all_comments(video_id, max_results=None):
     Args:
         video_id (str): YouTube video ID
         max_results (int, optional): Maximum number of comments to fetch. If None, fetches all.
+        refresh (bool): Skip the cache and fetch fresh comments
+        score_sentiment (bool): Batch-score each page's sentiment while later pages download,
+            so the caller's batch_sentiment_codes call is served from the sentiment cache
             
     Returns:
         list: List of comment dictionaries
@@ -65,47 +367,15 @@ def fetch_all_comments(video_id, max_results=None):
         ValueError: If API key is not configured or API request fails
     """
     all_comments = []
-    page_token = None
-    page_num = 1
+    scoring = []
     
     try:
-        while True:
-            logger.info(f"Fetching page {page_num} of comments...")
-            
-            # Fetch a page of comments (100 is the max per page)
-            result = fetch_comments(
-                video_id=video_id,
-                max_results=100,
-                page_token=page_token
-            )
-            
-            # Extract comments and next page token
-            page_comments = result["comments"]
-            next_page_token = result["metadata"]["nextPageToken"]
-            
-            # If no comments were found, exit the loop
-            if not page_comments or len(page_comments) == 0:
-                break
-            
+        for page_num, page_comments in enumerate(iter_comments(video_id, max_results, refresh), start=1):
+            logger.info(f"Fetched page {page_num} of comments...")
             all_comments.extend(page_comments)
             
-            # Check if we need to stop based on max_results
-            if max_results is not None and len(all_comments) >= max_results:
-                logger.info(f"Reached requested maximum of {max_results} comments")
-                all_comments = all_comments[:max_results]  # Trim to exact count
-                break
-            
-            # If no next page token, we're done
-            if not next_page_token:
-                logger.info("No more comment pages available")
-                break
-                
-            # Set the token for the next iteration
-            page_token = next_page_token
-            page_num += 1
-            
-            # Add a small delay to avoid hitting API rate limits
-            time.sleep(0.5)
+            if score_sentiment:
+                scoring.append(_SCORING_EXECUTOR.submit(_score_page, page_comments))
         
         logger.info(f"Successfully retrieved {len(all_comments)} comments!")
         return all_comments
@@ -118,17 +388,49 @@ def fetch_all_comments(video_id, max_results=None):
             return all_comments
         else:
             raise
+    
+    finally:
+        # Let page scoring finish so the caller's batch call hits the cache
+        wait(scoring)
+
+def stream_comment_pages(video_id, first_page, pages):
+    """
+    Write the /api/comments JSON body one page at a time
+    
+    The first page is fetched before the response starts so that API errors
+    still get an error status; the rest are serialized as they arrive, and
+    comment_count closes the object once the total is known.
+    
+    Args:
+        video_id (str): YouTube video ID
+        first_page (list): First page of comment dictionaries
+        pages (iterator): Remaining pages from iter_comments
+        
+    Yields:
+        bytes: Chunks of the JSON response body
+    """
+    yield b'{"success":true,"video_id":' + orjson.dumps(video_id) + b',"comments":[' + orjson.dumps(first_page)[1:-1]
+    comment_count = len(first_page)
+    
+    try:
+        for page_comments in pages:
+            if page_comments:
+                yield b',' + orjson.dumps(page_comments)[1:-1]
+                comment_count += len(page_comments)
+    except Exception as e:
+        # The status line is already sent, so close the document with what was streamed
+        logger.error(f"Error fetching all comments: {str(e)}")
+        logger.warning(f"Only retrieved {comment_count} comments due to an error.")
+    
+    yield b'],"comment_count":' + orjson.dumps(comment_count) + b'}'
 
 @app.route('/', methods=['GET'])
 def index():
     """API Root endpoint with documentation"""
     # Check if API key is configured
-    api_key = os.getenv('YOUTUBE_API_KEY')
-    api_configured = api_key and api_key != 'YOUR_API_KEY'
-    
     api_status = {
-        'status': 'ready' if api_configured else 'not configured',
-        'message': 'API is ready to use' if api_configured else 'YouTube API key not configured. Set YOUTUBE_API_KEY environment variable.'
+        'status': 'ready' if _API_CONFIGURED else 'not configured',
+        'message': 'API is ready to use' if _API_CONFIGURED else 'YouTube API key not configured. Set YOUTUBE_API_KEY environment variable.'
     }
     
     return jsonify({
@@ -146,35 +448,22 @@ def index():
             '/api/comments/search': 'Search for specific comments'
         },
         'requirements': 'Valid YouTube Data API key required for all endpoints',
-        'usage': 'Use ?url=YOUTUBE_VIDEO_URL parameter for most endpoints'
+        'usage': 'Use ?url=YOUTUBE_VIDEO_URL parameter for most endpoints; add refresh=1 to bypass the cache'
     })
 
 @app.route('/api/video-info', methods=['GET'])
-def get_video_info():
-    """Get basic information about a YouTube video"""
-    # Check if API key is configured
-    api_key = os.getenv('YOUTUBE_API_KEY')
-    if not api_key or api_key == 'YOUR_API_KEY':
-        return jsonify({'error': 'YouTube API key not configured. Please set YOUTUBE_API_KEY environment variable.'}), 503
-    
-    video_url = request.args.get('url')
-    
-    if not video_url:
-        return jsonify({'error': 'No URL provided'}), 400
-    
-    video_id = extract_video_id(video_url)
-    if not video_id:
-        return jsonify({'error': 'Invalid YouTube URL. Please provide a valid YouTube URL or video ID.'}), 400
-    
+@require_video_id(check_api_key=True)
+def get_video_info(video_id, max_comments):
+    """Get basic information about a YouTube video (max_comments does not apply here)"""
     try:
-        video_stats = extract_video_statistics(video_id)
+        video_stats = get_video_statistics(video_id, refresh=wants_refresh())
         if not video_stats:
             return jsonify({'error': 'Could not retrieve video information'}), 404
         
         # Add thumbnail URL to response
         video_stats['thumbnail_url'] = f"https://img.youtube.com/vi/{video_id}/0.jpg"
         
-        return jsonify({
+        return etag_json_response({
             'success': True,
             'video_id': video_id,
             'video_info': video_stats
@@ -192,28 +481,15 @@ def get_video_info():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/comments', methods=['GET'])
-def get_comments():
+@require_video_id()
+def get_comments(video_id, max_comments):
     """Get comments for a YouTube video"""
-    video_url = request.args.get('url')
-    max_comments = request.args.get('max_comments')
-    
-    if max_comments:
-        try:
-            max_comments = int(max_comments)
-        except ValueError:
-            return jsonify({'error': 'max_comments must be a number'}), 400
-    
-    if not video_url:
-        return jsonify({'error': 'No URL provided'}), 400
-    
-    video_id = extract_video_id(video_url)
-    if not video_id:
-        return jsonify({'error': 'Invalid YouTube URL. Please provide a valid YouTube URL or video ID.'}), 400
-    
     try:
-        comments = fetch_all_comments(video_id, max_results=max_comments)
+        # Stream each page to the client as it is fetched instead of buffering them all
+        pages = iter_comments(video_id, max_results=max_comments, refresh=wants_refresh())
+        first_page = next(pages, None)
         
-        if not comments:
+        if not first_page:
             return jsonify({
                 'success': True,
                 'video_id': video_id,
@@ -221,53 +497,33 @@ def get_comments():
                 'message': 'No comments found for this video.'
             })
         
-        # Normalize comment structure
-        for comment in comments:
-            # Ensure required fields exist
-            if 'likes' not in comment:
-                comment['likes'] = 0
-            if 'reply_count' not in comment:
-                comment['reply_count'] = 0
-            
-        return jsonify({
-            'success': True,
-            'video_id': video_id,
-            'comments': comments,
-            'comment_count': len(comments)
-        })
+        return Response(stream_with_context(stream_comment_pages(video_id, first_page, pages)), mimetype='application/json')
     
     except Exception as e:
         logger.error(f"Error fetching comments: {str(e)}", exc_info=True)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/analyze', methods=['GET'])
-def analyze_video():
+@require_video_id()
+def analyze_video(video_id, max_comments):
     """Comprehensive analysis of a YouTube video's comments"""
-    video_url = request.args.get('url')
-    max_comments = request.args.get('max_comments')
-    
-    if max_comments:
-        try:
-            max_comments = int(max_comments)
-        except ValueError:
-            return jsonify({'error': 'max_comments must be a number'}), 400
-    
-    if not video_url:
-        return jsonify({'error': 'No URL provided'}), 400
-    
-    video_id = extract_video_id(video_url)
-    if not video_id:
-        return jsonify({'error': 'Invalid YouTube URL. Please provide a valid YouTube URL or video ID.'}), 400
-    
     try:
-        # First try to get video statistics
-        video_stats = extract_video_statistics(video_id)
+        # Fetch video statistics and comments (either all or limited number) concurrently
+        refresh = wants_refresh()
+        stats_future = _EXECUTOR.submit(get_video_statistics, video_id, refresh)
+        comments_future = _EXECUTOR.submit(fetch_all_comments, video_id, max_comments, refresh, True)
+        
+        # Statistics are optional: still return the comment analysis if they fail
+        try:
+            video_stats = stats_future.result()
+        except Exception as e:
+            logger.error(f"Error fetching video statistics: {str(e)}")
+            video_stats = None
         if video_stats:
             # Add thumbnail URL to response
             video_stats['thumbnail_url'] = f"https://img.youtube.com/vi/{video_id}/0.jpg"
         
-        # Fetch comments - either all or limited number
-        comments = fetch_all_comments(video_id, max_results=max_comments)
+        comments = comments_future.result()
         
         if not comments:
             return jsonify({
@@ -278,56 +534,34 @@ def analyze_video():
                 'analysis': None
             })
         
-        # Analyze sentiment for each comment
-        for comment in comments:
-            comment['sentiment'] = analyze_sentiment(comment['text'])
+        # Extract topics, content ideas and keywords (from a single lowercasing pass)
+        # in the background while sentiment is scored here
+        text_bundle_future = _EXECUTOR.submit(get_text_bundle, video_id, max_comments, comments)
+        sentiment_codes = batch_sentiment_codes([comment['text'] for comment in comments])
+        
+        # The comments are only annotated once the text analysis has finished reading them
+        text_bundle = text_bundle_future.result()
+        topic_data = text_bundle['topics']
+        content_ideas = text_bundle['ideas']
+        keywords = text_bundle['keywords']
+        
+        # Annotate sentiment and total engagement in a single pass
+        # (likes and reply_count are already ints from utils.youtube_api)
+        total_likes = 0
+        total_replies = 0
+        for comment, code in zip(comments, sentiment_codes.tolist()):
+            sentiment = SENTIMENT_LABELS[code]
+            comment['sentiment'] = sentiment
             # Add sentiment emoji for frontend use
-            comment['sentiment_emoji'] = get_sentiment_emoji(comment['sentiment'])
-        
-        # Make sure likes is always a valid number
-        for comment in comments:
-            if 'likes' not in comment:
-                comment['likes'] = 0
-            elif not isinstance(comment['likes'], (int, float)):
-                try:
-                    comment['likes'] = int(comment['likes'])
-                except (ValueError, TypeError):
-                    comment['likes'] = 0
+            comment['sentiment_emoji'] = _EMOJI[sentiment]
             
-            # Make sure reply_count is always a valid number
-            if 'reply_count' not in comment:
-                comment['reply_count'] = 0
-            elif not isinstance(comment['reply_count'], (int, float)):
-                try:
-                    comment['reply_count'] = int(comment['reply_count'])
-                except (ValueError, TypeError):
-                    comment['reply_count'] = 0
-        
-        # Analyze comments
-        total_comments = len(comments)
-        total_likes = sum(comment.get('likes', 0) for comment in comments)
-        total_replies = sum(comment.get('reply_count', 0) for comment in comments)
-        
-        # Calculate sentiment counts
-        sentiment_counts = {
-            'positive': len([c for c in comments if c.get('sentiment') == 'positive']),
-            'neutral': len([c for c in comments if c.get('sentiment') == 'neutral']),
-            'negative': len([c for c in comments if c.get('sentiment') == 'negative'])
-        }
-        
-        # Get total sentiment percentage
-        total_sentiments = sum(sentiment_counts.values())
-        sentiment_percentages = {
-            k: round((v / total_sentiments) * 100) if total_sentiments else 0 
-            for k, v in sentiment_counts.items()
-        }
+            total_likes += comment['likes']
+            total_replies += comment['reply_count']
         
-        # Extract topics and content ideas
-        topic_data = extract_topics(comments)
-        content_ideas = generate_content_ideas(comments)
+        total_comments = len(comments)
         
-        # Extract keywords
-        keywords = extract_keywords(comments, top_n=20)
+        # Calculate sentiment counts and percentages
+        sentiment_counts, sentiment_percentages = sentiment_breakdown(sentiment_codes)
         
         # Create dashboard data structure
         analysis_data = {
@@ -340,57 +574,38 @@ def analyze_video():
             'sentiment_data': {
                 'counts': sentiment_counts,
                 'percentages': sentiment_percentages,
-                'formatted': [
-                    {'name': 'Positive', 'value': sentiment_counts['positive'], 'percentage': sentiment_percentages['positive'], 'emoji': get_sentiment_emoji('positive')},
-                    {'name': 'Neutral', 'value': sentiment_counts['neutral'], 'percentage': sentiment_percentages['neutral'], 'emoji': get_sentiment_emoji('neutral')},
-                    {'name': 'Negative', 'value': sentiment_counts['negative'], 'percentage': sentiment_percentages['negative'], 'emoji': get_sentiment_emoji('negative')}
-                ]
+                'formatted': format_sentiment(sentiment_counts, sentiment_percentages)
             },
             'topic_data': topic_data,
             'content_ideas': content_ideas,
             'keywords': keywords,
-            'top_comments': sorted(comments, key=lambda x: x.get('likes', 0), reverse=True)[:5],
-            'recent_comments': sorted(comments, key=lambda x: x.get('date', ''), reverse=True)[:5]
+            'top_comments': heapq.nlargest(5, comments, key=itemgetter('likes')),
+            'recent_comments': heapq.nlargest(5, comments, key=itemgetter('date'))
         }
         
         # Add timestamp for analysis
         analysis_timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
-        return jsonify({
+        return etag_json_response({
             'success': True,
             'video_id': video_id,
             'video_info': video_stats,
             'analysis': analysis_data,
             'analysis_timestamp': analysis_timestamp,
             'comments_analyzed': total_comments
-        })
+        }, volatile_keys=('analysis_timestamp',))
     
     except Exception as e:
         logger.error(f"Error analyzing video: {str(e)}", exc_info=True)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/sentiment', methods=['GET'])
-def analyze_sentiment_only():
+@require_video_id()
+def analyze_sentiment_only(video_id, max_comments):
     """Analyze only the sentiment of a YouTube video's comments"""
-    video_url = request.args.get('url')
-    max_comments = request.args.get('max_comments')
-    
-    if max_comments:
-        try:
-            max_comments = int(max_comments)
-        except ValueError:
-            return jsonify({'error': 'max_comments must be a number'}), 400
-    
-    if not video_url:
-        return jsonify({'error': 'No URL provided'}), 400
-    
-    video_id = extract_video_id(video_url)
-    if not video_id:
-        return jsonify({'error': 'Invalid YouTube URL. Please provide a valid YouTube URL or video ID.'}), 400
-    
     try:
         # Fetch comments
-        comments = fetch_all_comments(video_id, max_results=max_comments)
+        comments = fetch_all_comments(video_id, max_results=max_comments, refresh=wants_refresh(), score_sentiment=True)
         
         if not comments:
             return jsonify({
@@ -400,75 +615,40 @@ def analyze_sentiment_only():
                 'sentiment_analysis': None
             })
         
-        # Analyze sentiment for each comment
-        for comment in comments:
-            comment['sentiment'] = analyze_sentiment(comment['text'])
-            comment['sentiment_emoji'] = get_sentiment_emoji(comment['sentiment'])
-        
-        # Calculate sentiment counts
-        sentiment_counts = {
-            'positive': len([c for c in comments if c.get('sentiment') == 'positive']),
-            'neutral': len([c for c in comments if c.get('sentiment') == 'neutral']),
-            'negative': len([c for c in comments if c.get('sentiment') == 'negative'])
-        }
-        
-        # Get total sentiment percentage
-        total_sentiments = sum(sentiment_counts.values())
-        sentiment_percentages = {
-            k: round((v / total_sentiments) * 100) if total_sentiments else 0 
-            for k, v in sentiment_counts.items()
-        }
+        # Analyze sentiment for each comment as label codes
+        sentiment_codes = batch_sentiment_codes([comment['text'] for comment in comments])
+        for comment, code in zip(comments, sentiment_codes.tolist()):
+            sentiment = SENTIMENT_LABELS[code]
+            comment['sentiment'] = sentiment
+            comment['sentiment_emoji'] = _EMOJI[sentiment]
         
-        # Get sentiment emojis
-        sentiment_emojis = {
-            'positive': get_sentiment_emoji('positive'),
-            'neutral': get_sentiment_emoji('neutral'),
-            'negative': get_sentiment_emoji('negative')
-        }
+        # Calculate sentiment counts and percentages
+        sentiment_counts, sentiment_percentages = sentiment_breakdown(sentiment_codes)
         
-        return jsonify({
+        return streamed_json_response({
             'success': True,
             'video_id': video_id,
             'sentiment_analysis': {
                 'counts': sentiment_counts,
                 'percentages': sentiment_percentages,
-                'emojis': sentiment_emojis,
-                'formatted': [
-                    {'name': 'Positive', 'value': sentiment_counts['positive'], 'percentage': sentiment_percentages['positive'], 'emoji': sentiment_emojis['positive']},
-                    {'name': 'Neutral', 'value': sentiment_counts['neutral'], 'percentage': sentiment_percentages['neutral'], 'emoji': sentiment_emojis['neutral']},
-                    {'name': 'Negative', 'value': sentiment_counts['negative'], 'percentage': sentiment_percentages['negative'], 'emoji': sentiment_emojis['negative']}
-                ]
+                'emojis': _EMOJI,
+                'formatted': format_sentiment(sentiment_counts, sentiment_percentages)
             },
             'comments_analyzed': len(comments),
             'comments_with_sentiment': comments  # Include the full comment data with sentiment analysis
-        })
+        }, 'comments_with_sentiment')
     
     except Exception as e:
         logger.error(f"Error analyzing sentiment: {str(e)}", exc_info=True)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/topics', methods=['GET'])
-def analyze_topics_only():
+@require_video_id()
+def analyze_topics_only(video_id, max_comments):
     """Analyze only the topics of a YouTube video's comments"""
-    video_url = request.args.get('url')
-    max_comments = request.args.get('max_comments')
-    
-    if max_comments:
-        try:
-            max_comments = int(max_comments)
-        except ValueError:
-            return jsonify({'error': 'max_comments must be a number'}), 400
-    
-    if not video_url:
-        return jsonify({'error': 'No URL provided'}), 400
-    
-    video_id = extract_video_id(video_url)
-    if not video_id:
-        return jsonify({'error': 'Invalid YouTube URL. Please provide a valid YouTube URL or video ID.'}), 400
-    
     try:
         # Fetch comments
-        comments = fetch_all_comments(video_id, max_results=max_comments)
+        comments = fetch_all_comments(video_id, max_results=max_comments, refresh=wants_refresh())
         
         if not comments:
             return jsonify({
@@ -478,10 +658,11 @@ def analyze_topics_only():
                 'topic_analysis': None
             })
         
-        # Extract topics and content ideas
-        topic_data = extract_topics(comments)
-        content_ideas = generate_content_ideas(comments)
-        keywords = extract_keywords(comments, top_n=20)
+        # Extract topics, content ideas and keywords from a single lowercasing pass
+        text_bundle = get_text_bundle(video_id, max_comments, comments)
+        topic_data = text_bundle['topics']
+        content_ideas = text_bundle['ideas']
+        keywords = text_bundle['keywords']
         
         return jsonify({
             'success': True,
@@ -499,32 +680,15 @@ def analyze_topics_only():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/comments/search', methods=['GET'])
-def search_comments():
+@require_video_id(required_params={'q': 'No search term provided'})
+def search_comments(video_id, max_comments):
     """Search for comments containing specific terms"""
-    video_url = request.args.get('url')
     search_term = request.args.get('q')
-    max_comments = request.args.get('max_comments')
     sentiment_filter = request.args.get('sentiment')  # Optional filter by sentiment
     
-    if not video_url:
-        return jsonify({'error': 'No URL provided'}), 400
-    
-    if not search_term:
-        return jsonify({'error': 'No search term provided'}), 400
-    
-    if max_comments:
-        try:
-            max_comments = int(max_comments)
-        except ValueError:
-            return jsonify({'error': 'max_comments must be a number'}), 400
-    
-    video_id = extract_video_id(video_url)
-    if not video_id:
-        return jsonify({'error': 'Invalid YouTube URL. Please provide a valid YouTube URL or video ID.'}), 400
-    
     try:
         # Fetch all comments first
-        comments = fetch_all_comments(video_id, max_results=max_comments)
+        comments = fetch_all_comments(video_id, max_results=max_comments, refresh=wants_refresh())
         
         if not comments:
             return jsonify({
@@ -534,17 +698,19 @@ def search_comments():
                 'search_results': []
             })
         
-        # Add sentiment to comments
-        for comment in comments:
-            comment['sentiment'] = analyze_sentiment(comment['text'])
-        
-        # Filter based on search term
+        # Filter based on search term (case-insensitive, without lowercasing every comment)
         search_term = search_term.lower()
-        search_results = [c for c in comments if search_term in c['text'].lower()]
+        search_pattern = re.compile(re.escape(search_term), re.IGNORECASE)
+        search_results = [c for c in comments if search_pattern.search(c['text'])]
+        
+        # Add sentiment to the matching comments only
+        sentiments = batch_analyze_sentiments([comment['text'] for comment in search_results])
+        for comment, sentiment in zip(search_results, sentiments):
+            comment['sentiment'] = sentiment
         
         # Apply sentiment filter if provided
-        if sentiment_filter and sentiment_filter in ['positive', 'neutral', 'negative']:
-            search_results = [c for c in search_results if c.get('sentiment') == sentiment_filter]
+        if sentiment_filter and sentiment_filter in SENTIMENT_LABELS:
+            search_results = [c for c, sentiment in zip(search_results, sentiments) if sentiment == sentiment_filter]
         
         return jsonify({
             'success': True,
@@ -563,10 +729,7 @@ def search_comments():
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Simple health check endpoint"""
-    api_key = os.getenv('YOUTUBE_API_KEY')
-    api_configured = api_key and api_key != 'YOUR_API_KEY'
-    
-    if not api_configured:
+    if not _API_CONFIGURED:
         return jsonify({
             'status': 'error',
             'service': 'youtube-analytics-api',
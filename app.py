@@ -1,12 +1,19 @@
 #app.py
 import streamlit as st
-import re
+import heapq
+from operator import itemgetter
 import logging
+import threading
+import uuid
+import orjson
 import pandas as pd
+import numpy as np
 from datetime import datetime
-from utils.youtube_api import fetch_comments, extract_video_statistics
-from utils.sentiment import analyze_sentiment, get_sentiment_emoji
-from utils.topic_analysis import extract_topics, generate_content_ideas, extract_keywords
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
+from utils.youtube_api import iter_comment_pages, extract_video_statistics, extract_video_id
+from utils.sentiment import SENTIMENT_LABELS, batch_sentiment_codes, get_sentiment_emoji
+from utils.topic_analysis import analyze_text_bundle
 from components.dashboard import render_dashboard
 from components.sentiment_view import render_sentiment_view
 from components.topic_view import render_topic_view
@@ -30,21 +37,67 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Try to load custom CSS
-try:
-    with open("assets/style.css") as f:
-        st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
-except FileNotFoundError:
-    logger.warning("CSS file not found. Using default styling.")
-    # Add minimal default styling
-    st.markdown("""
+@st.cache_resource
+def load_css():
+    """
+    Read the custom CSS once per process instead of on every rerun
+    
+    (The style element itself is still sent on every rerun: Streamlit removes
+    elements that a rerun does not emit.)
+    
+    Returns:
+        str: <style> block to inject into the page
+    """
+    try:
+        with open("assets/style.css") as f:
+            return f'<style>{f.read()}</style>'
+    except FileNotFoundError:
+        logger.warning("CSS file not found. Using default styling.")
+        # Add minimal default styling
+        return """
         <style>
         .header {background: linear-gradient(to right, #4f46e5, #7c3aed); color: white; padding: 2rem 1rem; border-radius: 0.5rem; margin-bottom: 1.5rem; text-align: center;}
         .header h1 {font-size: 2.25rem; font-weight: 700; margin-bottom: 0.5rem;}
         .welcome-container {text-align: center; padding: 3rem; background-color: #f8fafc; border-radius: 0.75rem; border: 1px solid #e2e8f0; margin: 2rem 0;}
         footer {background-color: #1f2937; color: #e5e7eb; padding: 2rem 1rem; margin-top: 3rem; border-radius: 0.5rem;}
         </style>
-    """, unsafe_allow_html=True)
+    """
+
+# Try to load custom CSS
+st.markdown(load_css(), unsafe_allow_html=True)
+
+# Comments scored per sentiment batch
+SENTIMENT_BATCH_SIZE = 512
+
+# Every progress bar/status update is a message to the browser, so loops send at most this many per second
+PROGRESS_UPDATES_PER_SECOND = 10
+
+# How long a completed analysis is reused for the same video and comment count
+ANALYSIS_CACHE_TTL_SECONDS = 3600
+
+# Quota-saver mode only fetches comments mentioning a timestamp ("0:" to "59:" or "1:00:"
+# to "1:59:"), which are the most content-specific ones; long videos then need far
+# fewer 100-comment pages (API requests), at the cost of analyzing fewer comments
+QUOTA_SAVER_SEARCH_TERMS = " | ".join(
+    [f"{minute}:" for minute in range(60)] + [f"1:{minute:02d}:" for minute in range(60)]
+)
+
+@st.cache_resource
+def get_analysis_cache():
+    """
+    Completed analyses shared by every rerun and session of this server process
+    
+    Keyed on (video_id, max_comments, search_terms) so analyzing the same video
+    again costs no API quota. search_terms must stay in the key: it separates
+    quota-saver (timestamp comments only) analyses from full ones. Values are
+    stored serialized so each session gets its own copy.
+    (st.cache_data is not used on the analysis itself because it would replay the
+    fetch progress bars on every cache hit.)
+    
+    Returns:
+        tuple: (TTLCache, threading.Lock guarding it)
+    """
+    return TTLCache(maxsize=32, ttl=ANALYSIS_CACHE_TTL_SECONDS), threading.Lock()
 
 # Initialize session state variables if they don't exist
 if 'comments' not in st.session_state:
@@ -59,124 +112,160 @@ if 'current_view' not in st.session_state:
     st.session_state.current_view = "overview"
 if 'analysis_timestamp' not in st.session_state:
     st.session_state.analysis_timestamp = None
+# Changes whenever st.session_state.comments is replaced; views key their cached
+# filter/sort results on it instead of hashing the whole comments list
+if 'comments_version' not in st.session_state:
+    st.session_state.comments_version = None
 if 'error_message' not in st.session_state:
     st.session_state.error_message = None
 
-# Function to extract YouTube video ID
-def extract_video_id(url):
-    """Extract the YouTube video ID from various URL formats"""
-    if not url:
-        return None
-        
-    patterns = [
-        r'(?:youtube\.com\/(?:[^\/\n\s]+\/\S+\/|(?:v|e(?:mbed)?)\/|\S*?[?&]v=)|youtu\.be\/)([a-zA-Z0-9_-]{11})',
-        r'(?:youtube\.com\/shorts\/)([a-zA-Z0-9_-]{11})',
-        r'(?:youtube\.com\/live\/)([a-zA-Z0-9_-]{11})'
-    ]
+class ProgressThrottle:
+    """Rate-limit progress updates in a loop to PROGRESS_UPDATES_PER_SECOND"""
     
-    for pattern in patterns:
-        match = re.search(pattern, url)
-        if match:
-            return match.group(1)
+    def __init__(self, updates_per_second=PROGRESS_UPDATES_PER_SECOND):
+        self.interval = 1.0 / updates_per_second
+        self.last_update = float('-inf')
     
-    # Check if the input is directly a video ID (11 characters)
-    if re.match(r'^[a-zA-Z0-9_-]{11}$', url):
-        return url
-        
-    return None
+    def ready(self):
+        """Return True (and start a new interval) if an update may be sent now"""
+        now = time.monotonic()
+        if now - self.last_update < self.interval:
+            return False
+        self.last_update = now
+        return True
 
 # Function to reset session state
 def reset_analysis():
     """Reset all analysis-related session state variables"""
     st.session_state.comments = []
+    st.session_state.comments_version = None
     st.session_state.dashboard_data = None
     st.session_state.video_stats = None
     st.session_state.analysis_timestamp = None
     st.session_state.error_message = None
 
+def load_cached_analysis(video_id, max_comments, search_terms=None):
+    """
+    Restore a cached analysis of this video into session state
+    
+    Args:
+        video_id (str): YouTube video ID
+        max_comments (int, optional): Number of comments analyzed, None for all
+        search_terms (str, optional): searchTerms filter the comments were fetched with
+        
+    Returns:
+        bool: True if a cached analysis was found and loaded
+    """
+    analysis_cache, lock = get_analysis_cache()
+    with lock:
+        cached = analysis_cache.get((video_id, max_comments, search_terms))
+    if cached is None:
+        return False
+    
+    analysis = orjson.loads(cached)
+    st.session_state.video_stats = analysis['video_stats']
+    st.session_state.comments = analysis['comments']
+    st.session_state.comments_version = uuid.uuid4().hex
+    st.session_state.dashboard_data = analysis['dashboard_data']
+    st.session_state.analysis_timestamp = analysis['analysis_timestamp']
+    return True
+
+def cache_analysis(video_id, max_comments, search_terms=None):
+    """
+    Store the analysis currently in session state for other runs and sessions
+    
+    Args:
+        video_id (str): YouTube video ID
+        max_comments (int, optional): Number of comments analyzed, None for all
+        search_terms (str, optional): searchTerms filter the comments were fetched with
+    """
+    analysis = orjson.dumps({
+        'video_stats': st.session_state.video_stats,
+        'comments': st.session_state.comments,
+        'dashboard_data': st.session_state.dashboard_data,
+        'analysis_timestamp': st.session_state.analysis_timestamp
+    })
+    analysis_cache, lock = get_analysis_cache()
+    with lock:
+        analysis_cache[(video_id, max_comments, search_terms)] = analysis
+
 # Function to fetch all comments with pagination
-# Function to fetch all comments with pagination
-def fetch_all_comments(video_id, max_results=None):
+def fetch_all_comments(video_id, max_results=None, search_terms=None, stats_future=None):
     """
     Fetch all comments from a YouTube video using pagination
     
+    Each page is requested while the previous one is parsed, and its sentiment is
+    batch-scored on a worker thread while later pages download, so the analysis
+    stage afterwards is served from the sentiment cache. Request pacing and
+    rate-limit backoff are handled in utils.youtube_api.
+    
     Args:
         video_id (str): YouTube video ID
         max_results (int, optional): Maximum number of comments to fetch. If None, fetches all.
+        search_terms (str, optional): Only fetch comments matching these terms
+        stats_future (Future, optional): Video statistics requested alongside the first
+            page; its error is raised once that page arrives, before any more are fetched
             
     Returns:
-        list: List of comment dictionaries
+        tuple: (list of comment dictionaries, whether every requested comment was fetched)
     """
     all_comments = []
-    page_token = None
-    page_num = 1
     
     with st.spinner("Fetching comments..."):
         progress_bar = st.progress(0)
         status_text = st.empty()
+        status_text.text("Fetching page 1 of comments...")
+        progress_throttle = ProgressThrottle()
         
-        try:
-            while True:
-                status_text.text(f"Fetching page {page_num} of comments...")
-                
-                # Fetch a page of comments (100 is the max per page)
-                result = fetch_comments(
-                    video_id=video_id,
-                    max_results=100,
-                    page_token=page_token
-                )
-                
-                # Now fetch_comments always returns a dictionary with 'comments' and 'metadata'
-                page_comments = result["comments"]
-                next_page_token = result["metadata"]["nextPageToken"]
-                
-                # If no comments were found, exit the loop
-                if not page_comments or len(page_comments) == 0:
-                    break
-                
-                all_comments.extend(page_comments)
-                
-                # Update progress
-                status_text.text(f"Retrieved {len(all_comments)} comments so far...")
+        # Leaving this block waits for every submitted page to be scored
+        with ThreadPoolExecutor(max_workers=1) as sentiment_scorer:
+            try:
+                for page_num, page_comments in enumerate(iter_comment_pages(video_id, max_results, search_terms), start=1):
+                    # Fail before paging through the rest if the statistics could not be
+                    # fetched (nothing is kept yet, so the error is raised, not a partial result)
+                    if page_num == 1 and stats_future is not None:
+                        stats_future.result()
+                    
+                    # The dashboard never shows author channel links or avatars, so keep them
+                    # out of session state (and the analysis cache)
+                    for comment in page_comments:
+                        del comment['author_channel_url'], comment['author_profile_image']
+                    
+                    all_comments.extend(page_comments)
+                    sentiment_scorer.submit(batch_sentiment_codes, [comment['text'] for comment in page_comments])
+                    
+                    # Update progress (throttled)
+                    if progress_throttle.ready():
+                        status_text.text(f"Retrieved {len(all_comments)} comments so far...")
+                        
+                        # Show incremental progress
+                        progress_value = min(0.95, page_num * 0.1)  # Never quite reaches 100% until done
+                        progress_bar.progress(progress_value)
+                    
+                    # Check if we need to stop based on max_results
+                    if max_results is not None and len(all_comments) >= max_results:
+                        logger.info(f"Reached requested maximum of {max_results} comments")
+                        all_comments = all_comments[:max_results]  # Trim to exact count
+                        break
+                else:
+                    logger.info("No more comment pages available")
                 
-                # Show incremental progress
-                progress_value = min(0.95, page_num * 0.1)  # Never quite reaches 100% until done
-                progress_bar.progress(progress_value)
+                # Finalize progress
+                progress_bar.progress(1.0)
+                status_text.text(f"Successfully retrieved {len(all_comments)} comments!")
                 
-                # Check if we need to stop based on max_results
-                if max_results is not None and len(all_comments) >= max_results:
-                    logger.info(f"Reached requested maximum of {max_results} comments")
-                    all_comments = all_comments[:max_results]  # Trim to exact count
-                    break
+                return all_comments, True
                 
-                # If no next page token, we're done
-                if not next_page_token:
-                    logger.info("No more comment pages available")
-                    break
-                    
-                # Set the token for the next iteration
-                page_token = next_page_token
-                page_num += 1
+            except Exception as e:
+                logger.error(f"Error fetching all comments: {str(e)}")
+                status_text.text(f"Error: {str(e)}")
                 
-                # Add a small delay to avoid hitting API rate limits
-                time.sleep(0.5)
-            
-            # Finalize progress
-            progress_bar.progress(1.0)
-            status_text.text(f"Successfully retrieved {len(all_comments)} comments!")
-            
-            return all_comments
-            
-        except Exception as e:
-            logger.error(f"Error fetching all comments: {str(e)}")
-            status_text.text(f"Error: {str(e)}")
-            
-            # Return any comments we managed to fetch before the error
-            if all_comments:
-                st.warning(f"Only retrieved {len(all_comments)} comments due to an error.")
-                return all_comments
-            else:
-                raise
+                # Return any comments we managed to fetch before the error
+                if all_comments:
+                    st.warning(f"Only retrieved {len(all_comments)} comments due to an error.")
+                    return all_comments, False
+                else:
+                    raise
 
 # Application header
 st.markdown("""
@@ -219,11 +308,9 @@ with main_tab:
         with col1:
             submit_button = st.form_submit_button("🔍 Analyze Video", use_container_width=True)
         with col3:
-            reset_button = st.form_submit_button("🔄 Reset", use_container_width=True)
-            
-        if reset_button:
-            reset_analysis()
-            st.experimental_rerun()
+            # Reset in a callback, before the rerun the click starts, instead of
+            # resetting mid-run and forcing a second rerun
+            st.form_submit_button("🔄 Reset", use_container_width=True, on_click=reset_analysis)
         
         if submit_button and video_url:
             video_id = extract_video_id(video_url)
@@ -235,109 +322,120 @@ with main_tab:
                 # Show loading indicator
                 with st.spinner('Fetching and analyzing YouTube comments...'):
                     try:
-                        # First try to get video statistics
-                        video_stats = extract_video_statistics(video_id)
-                        if video_stats:
-                            st.session_state.video_stats = video_stats
+                        search_terms = QUOTA_SAVER_SEARCH_TERMS if st.session_state.get('quota_saver') else None
+                        if search_terms:
+                            logger.info("Quota-saver mode: fetching only comments that mention a timestamp")
                         
-                        # Fetch comments - either all or limited number
-                        if max_comments is None:
-                            # Use our new function to fetch all comments
-                            comments = fetch_all_comments(video_id)
+                        # Reuse a recent analysis of the same video and comment count
+                        if load_cached_analysis(video_id, max_comments, search_terms):
+                            st.success(f"Loaded the analysis of {len(st.session_state.comments)} comments from {st.session_state.analysis_timestamp}.")
                         else:
-                            # Use existing function with max_results
-                            comments = fetch_all_comments(video_id, max_results=max_comments)
-                        
-                        if not comments:
-                            st.warning("No comments found for this video. This could be because comments are disabled or the video doesn't have any comments yet.")
-                            st.session_state.error_message = "No comments found for this video."
-                        else:
-                            # Show progress for sentiment analysis
-                            sentiment_progress_bar = st.progress(0)
-                            sentiment_status = st.empty()
-                            sentiment_status.text("Analyzing sentiment of comments...")
-                            
-                            # Analyze sentiment for each comment
-                            for i, comment in enumerate(comments):
-                                comment['sentiment'] = analyze_sentiment(comment['text'])
-                                # Update progress periodically
-                                if i % 10 == 0 or i == len(comments) - 1:
-                                    progress = min(1.0, (i + 1) / len(comments))
-                                    sentiment_progress_bar.progress(progress)
-                                    sentiment_status.text(f"Analyzing sentiment: {i+1}/{len(comments)} comments")
-                            
-                            # Clear sentiment analysis progress indicators
-                            sentiment_status.empty()
-                            
-                            # Log a sample comment to debug
-                            if comments:
-                                logger.info(f"Sample comment structure: {comments[0].keys()}")
-                            
-                            # Store in session state
-                            st.session_state.comments = comments
-                            st.session_state.analysis_timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                            
-                            # Make sure likes is always a valid number
-                            for comment in comments:
-                                if 'likes' not in comment:
-                                    comment['likes'] = 0
-                                elif not isinstance(comment['likes'], (int, float)):
-                                    try:
-                                        comment['likes'] = int(comment['likes'])
-                                    except (ValueError, TypeError):
-                                        comment['likes'] = 0
-                            
-                            # Analyze comments for dashboard
-                            total_comments = len(comments)
-                            # Use safe get() method with default 0 for likes
-                            total_likes = sum(comment.get('likes', 0) for comment in comments)
-                            # Use safe get() method with default 0 for reply_count
-                            total_replies = sum(comment.get('reply_count', 0) for comment in comments)
-                            
-                            # Calculate sentiment counts
-                            sentiment_counts = {
-                                'positive': len([c for c in comments if c.get('sentiment') == 'positive']),
-                                'neutral': len([c for c in comments if c.get('sentiment') == 'neutral']),
-                                'negative': len([c for c in comments if c.get('sentiment') == 'negative'])
-                            }
-                            
-                            # Get total sentiment percentage
-                            total_sentiments = sum(sentiment_counts.values())
-                            sentiment_percentages = {
-                                k: round((v / total_sentiments) * 100) if total_sentiments else 0 
-                                for k, v in sentiment_counts.items()
-                            }
-                            
-                            # Extract topics and content ideas
-                            topic_data = extract_topics(comments)
-                            content_ideas = generate_content_ideas(comments)
-                            
-                            # Extract keywords
-                            keywords = extract_keywords(comments, top_n=20)
-                            
-                            # Create dashboard data structure
-                            st.session_state.dashboard_data = {
-                                'basic_stats': {
-                                    'total_comments': total_comments,
-                                    'total_likes': total_likes,
-                                    'total_replies': total_replies,
-                                    'engagement_rate': round(total_likes / total_comments, 1) if total_comments else 0
-                                },
-                                'sentiment_data': [
-                                    {'name': 'Positive', 'value': sentiment_counts['positive'], 'percentage': sentiment_percentages['positive']},
-                                    {'name': 'Neutral', 'value': sentiment_counts['neutral'], 'percentage': sentiment_percentages['neutral']},
-                                    {'name': 'Negative', 'value': sentiment_counts['negative'], 'percentage': sentiment_percentages['negative']}
-                                ],
-                                'topic_data': topic_data,
-                                'content_ideas': content_ideas,
-                                'keywords': keywords,
-                                'top_comments': sorted(comments, key=lambda x: x.get('likes', 0), reverse=True)[:5],
-                                'recent_comments': sorted(comments, key=lambda x: x.get('date', ''), reverse=True)[:5]
-                            }
-                            
-                            # Success message
-                            st.success(f"Successfully analyzed {total_comments} comments!")
+                            # Request video statistics in the background while the comment pages are fetched
+                            with ThreadPoolExecutor(max_workers=1) as stats_executor:
+                                stats_future = stats_executor.submit(extract_video_statistics, video_id)
+                                
+                                # Fetch comments - either all or limited number
+                                if max_comments is None:
+                                    # Use our new function to fetch all comments
+                                    comments, fetch_complete = fetch_all_comments(video_id, search_terms=search_terms, stats_future=stats_future)
+                                else:
+                                    # Use existing function with max_results
+                                    comments, fetch_complete = fetch_all_comments(video_id, max_results=max_comments, search_terms=search_terms, stats_future=stats_future)
+                                
+                                video_stats = stats_future.result()
+                            if video_stats:
+                                st.session_state.video_stats = video_stats
                             
+                            if not comments:
+                                st.warning("No comments found for this video. This could be because comments are disabled or the video doesn't have any comments yet.")
+                                st.session_state.error_message = "No comments found for this video."
+                            else:
+                                # Show progress for sentiment analysis
+                                sentiment_progress_bar = st.progress(0)
+                                sentiment_status = st.empty()
+                                sentiment_status.text("Analyzing sentiment of comments...")
+                                
+                                # Analyze sentiment in batches of label codes (see utils.sentiment.SENTIMENT_LABELS)
+                                texts = [comment['text'] for comment in comments]
+                                sentiment_codes = np.empty(len(comments), dtype=np.int8)
+                                progress_throttle = ProgressThrottle()
+                                for start in range(0, len(comments), SENTIMENT_BATCH_SIZE):
+                                    end = min(start + SENTIMENT_BATCH_SIZE, len(comments))
+                                    sentiment_codes[start:end] = batch_sentiment_codes(texts[start:end])
+                                    
+                                    # Update progress (throttled)
+                                    if progress_throttle.ready():
+                                        sentiment_progress_bar.progress(end / len(comments))
+                                        sentiment_status.text(f"Analyzing sentiment: {end}/{len(comments)} comments")
+                                sentiment_progress_bar.progress(1.0)
+                                
+                                for comment, code in zip(comments, sentiment_codes.tolist()):
+                                    comment['sentiment'] = SENTIMENT_LABELS[code]
+                                
+                                # Clear sentiment analysis progress indicators
+                                sentiment_status.empty()
+                                
+                                # Log a sample comment to debug
+                                if comments:
+                                    logger.info(f"Sample comment structure: {comments[0].keys()}")
+                                
+                                # Store in session state
+                                st.session_state.comments = comments
+                                st.session_state.comments_version = uuid.uuid4().hex
+                                st.session_state.analysis_timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                                
+                                # Analyze comments for dashboard: total likes and replies in one pass
+                                # (both are already ints from utils.youtube_api)
+                                total_comments = len(comments)
+                                total_likes = 0
+                                total_replies = 0
+                                for comment in comments:
+                                    total_likes += comment['likes']
+                                    total_replies += comment['reply_count']
+                                
+                                # Calculate sentiment counts from the label codes
+                                sentiment_counts = dict(zip(SENTIMENT_LABELS, np.bincount(sentiment_codes, minlength=3).tolist()))
+                                
+                                # Get total sentiment percentage
+                                total_sentiments = sum(sentiment_counts.values())
+                                sentiment_percentages = {
+                                    k: round((v / total_sentiments) * 100) if total_sentiments else 0 
+                                    for k, v in sentiment_counts.items()
+                                }
+                                
+                                # Extract topics, content ideas and keywords from a single lowercasing pass
+                                text_bundle = analyze_text_bundle(comments, top_n_keywords=20)
+                                topic_data = text_bundle['topics']
+                                content_ideas = text_bundle['ideas']
+                                keywords = text_bundle['keywords']
+                                
+                                # Create dashboard data structure
+                                st.session_state.dashboard_data = {
+                                    'basic_stats': {
+                                        'total_comments': total_comments,
+                                        'total_likes': total_likes,
+                                        'total_replies': total_replies,
+                                        'engagement_rate': round(total_likes / total_comments, 1) if total_comments else 0
+                                    },
+                                    'sentiment_data': [
+                                        {'name': 'Positive', 'value': sentiment_counts['positive'], 'percentage': sentiment_percentages['positive']},
+                                        {'name': 'Neutral', 'value': sentiment_counts['neutral'], 'percentage': sentiment_percentages['neutral']},
+                                        {'name': 'Negative', 'value': sentiment_counts['negative'], 'percentage': sentiment_percentages['negative']}
+                                    ],
+                                    'topic_data': topic_data,
+                                    'content_ideas': content_ideas,
+                                    'keywords': keywords,
+                                    'top_comments': heapq.nlargest(5, comments, key=itemgetter('likes')),
+                                    'recent_comments': heapq.nlargest(5, comments, key=itemgetter('date'))
+                                }
+                                
+                                # Only complete analyses are reused; partial ones are retried next time
+                                if fetch_complete:
+                                    cache_analysis(video_id, max_comments, search_terms)
+                                
+                                # Success message
+                                st.success(f"Successfully analyzed {total_comments} comments!")
+                    
                     except Exception as e:
                         logger.error(f"Error during analysis: {str(e)}", exc_info=True)
                         st.error(f"Error analyzing video: {str(e)}")
@@ -345,7 +443,7 @@ with main_tab:
             else:
                 st.error("Invalid YouTube URL. Please enter a valid YouTube URL or video ID.")
                 st.session_state.error_message = "Invalid YouTube URL format."
-    
+
     # If there's an error, provide helpful information
     if st.session_state.error_message and not st.session_state.dashboard_data:
         st.error(st.session_state.error_message)
@@ -463,11 +561,11 @@ if st.session_state.dashboard_data:
         if st.session_state.current_view == "overview":
             render_dashboard(st.session_state.dashboard_data)
         elif st.session_state.current_view == "sentiment":
-            render_sentiment_view(st.session_state.dashboard_data, st.session_state.comments)
+            render_sentiment_view(st.session_state.dashboard_data, st.session_state.comments, st.session_state.comments_version)
         elif st.session_state.current_view == "topics":
             render_topic_view(st.session_state.dashboard_data)
         elif st.session_state.current_view == "comments":
-            render_comments_view(st.session_state.dashboard_data, st.session_state.comments)
+            render_comments_view(st.session_state.dashboard_data, st.session_state.comments, st.session_state.comments_version)
 else:
     with main_tab:
         # Welcome message when no data is loaded
@@ -543,12 +641,18 @@ with settings_tab:
             st.warning("⚠️ YouTube API key is not configured")
     
     with st.expander("Cache & Data Settings"):
-        if st.button("Clear Session Data"):
-            reset_analysis()
+        # Cleared in a callback so the rest of the page already renders without the data
+        if st.button("Clear Session Data", on_click=reset_analysis):
             st.success("Session data cleared successfully!")
             
         st.info("Note: YouTube API has a quota limit. Fetching all comments from popular videos may consume a significant portion of your daily quota.")
         
+        st.checkbox(
+            "Quota-saver mode",
+            key='quota_saver',
+            help="Only analyze comments that mention a timestamp (e.g. 4:20). Long videos need far fewer API requests, but fewer comments are analyzed."
+        )
+        
         st.markdown("""
         ### About YouTube API Quotas
         
@@ -1,98 +1,272 @@
 #comments_view.py
 import streamlit as st
 import pandas as pd
+import numpy as np
 import math
-from utils.sentiment import get_sentiment_emoji, get_sentiment_color
+import html
+import textwrap
+from functools import lru_cache
+from utils.sentiment import SENTIMENT_LABELS, get_sentiment_emoji, get_sentiment_color
 
-def render_comments_view(dashboard_data, comments):
+# Styles for the view, built once at import. They are still sent on every rerun:
+# Streamlit drops elements a rerun does not emit, so sending them once per session
+# would unstyle the page after the first interaction
+_COMMENTS_CSS = """
+<style>
+.stat-card {
+    padding: 1.2rem;
+    border-radius: 8px;
+    background-color: #f8f9fa;
+    box-shadow: 0 2px 5px rgba(0,0,0,0.1);
+    text-align: center;
+    height: 100%;
+}
+.stat-value {
+    font-size: 1.8rem;
+    font-weight: bold;
+    color: #1f77b4;
+    margin-bottom: 0.3rem;
+}
+.stat-label {
+    font-size: 0.9rem;
+    color: #555;
+}
+.comment-card {
+    padding: 1rem;
+    margin-bottom: 1rem;
+    border-radius: 6px;
+    background-color: white;
+    box-shadow: 0 1px 3px rgba(0,0,0,0.1);
+    border-left: 4px solid;
+}
+.comment-header {
+    display: flex;
+    justify-content: space-between;
+    align-items: center;
+    margin-bottom: 0.5rem;
+}
+.comment-author {
+    font-weight: bold;
+    font-size: 1rem;
+}
+.comment-details {
+    display: flex;
+    gap: 8px;
+    align-items: center;
+}
+.comment-date {
+    color: #777;
+    font-size: 0.8rem;
+}
+.sentiment-badge {
+    padding: 3px 8px;
+    border-radius: 12px;
+    font-size: 0.8rem;
+    font-weight: 500;
+}
+.comment-text {
+    margin: 0.6rem 0;
+    line-height: 1.4;
+}
+.comment-footer {
+    display: flex;
+    gap: 12px;
+    font-size: 0.9rem;
+    color: #555;
+}
+.filter-section {
+    background-color: #f8f9fa;
+    padding: 1rem;
+    border-radius: 8px;
+    margin-bottom: 1.5rem;
+}
+.pagination-nav {
+    display: flex;
+    justify-content: center;
+    align-items: center;
+    gap: 10px;
+    margin: 20px 0;
+}
+</style>
+"""
+
+# Comment card markup, dedented before the comment text is filled in: a page's cards
+# share one st.markdown call, and the unindented lines of a multi-line comment would
+# otherwise stop Streamlit's dedent, leaving the next cards indented (rendered as code).
+# The optional replies span shares the likes line so it never leaves a blank line.
+_COMMENT_CARD_TEMPLATE = textwrap.dedent("""
+    <div class="comment-card" style="border-left-color: {color};">
+        <div class="comment-header">
+            <span class="comment-author">@{author_name}</span>
+            <div class="comment-details">
+                <span class="comment-date">{comment_date}</span>
+                <span class="sentiment-badge" style="background-color: {color}20; color: {color};">
+                    {emoji} {sentiment}
+                </span>
+            </div>
+        </div>
+        <p class="comment-text">{text}</p>
+        <div class="comment-footer">
+            <span>👍 {likes} likes</span>{replies}
+        </div>
+    </div>
+""").strip() + "\n"
+
+def comment_text_html(text):
+    """
+    Escape comment text for a card and keep it on a single line
+    
+    A page's cards share one markdown element. A blank line inside a comment would
+    end the HTML block there, so the rest of the comment (a ``` fence, an indented
+    line) and every later card would be parsed as markdown. Line breaks become <br>.
+    
+    Args:
+        text (str): Comment text
+        
+    Returns:
+        str: Escaped single-line HTML
+    """
+    return "<br>".join(html.escape(text).splitlines())
+
+@lru_cache(maxsize=5000)
+def _comment_card_html(author_name, comment_date, sentiment, text, likes, reply_count):
+    """
+    Build the HTML card for a comment, memoized so paging back and forth reuses it
+    
+    (lru_cache rather than st.cache_data: hashing and pickling the arguments on
+    every call would cost more than formatting the card.)
+    
+    Args:
+        author_name (str): Comment author
+        comment_date (str): Publication date
+        sentiment (str): Sentiment label
+        text (str): Comment text
+        likes (int): Like count
+        reply_count (int): Reply count
+        
+    Returns:
+        str: Comment card HTML
+    """
+    color = get_sentiment_color(sentiment)
+    emoji = get_sentiment_emoji(sentiment)
+    
+    # Create a unified comment component with fixed HTML structure; author and text are
+    # user content, so they are escaped rather than rendered as markup
+    return _COMMENT_CARD_TEMPLATE.format(
+        color=color,
+        author_name=html.escape(author_name),
+        comment_date=comment_date,
+        emoji=emoji,
+        sentiment=sentiment.capitalize(),
+        text=comment_text_html(text),
+        likes=likes,
+        replies=f" <span>💬 {reply_count} replies</span>" if reply_count > 0 else ""
+    )
+
+# Reruns only the decorated function when a widget inside it changes (st.fragment from
+# Streamlit 1.37, st.experimental_fragment from 1.33); on older versions it is a plain
+# call and the whole script reruns
+_fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None) or (lambda func: func)
+
+# Sort option -> column it orders by (descending)
+_SORT_FIELDS = {
+    "Most Likes": 'likes',
+    "Most Recent": 'date',
+    "Most Replies": 'reply_count'
+}
+
+# Sentiment label -> code in the sentiment column
+_SENTIMENT_CODES = {label: code for code, label in enumerate(SENTIMENT_LABELS)}
+
+@st.cache_resource(ttl=600, max_entries=32)
+def comment_columns(_comments, comments_version):
+    """
+    Columnar copy of the fields the filter and sort read, built once per comments list
+    
+    Filtering becomes a mask and sorting an argsort over these arrays, in C, instead
+    of a dict lookup per comment per field. Rendering still reads the page's comment
+    dicts. (cache_resource rather than cache_data: the columns are only read, so they
+    are shared instead of copied on every call.)
+    
+    Args:
+        _comments (list): List of comment dictionaries (not hashed)
+        comments_version (str): Identifier of this comments list
+        
+    Returns:
+        dict: Column name -> values by comment index ('sentiment' codes,
+            'sentiment_bit', 'likes', 'reply_count' and 'date' as numpy arrays,
+            'text_lower' as a list)
+    """
+    count = len(_comments)
+    sentiment = np.fromiter((_SENTIMENT_CODES.get(c['sentiment'], -1) for c in _comments), np.int8, count)
+    
+    # Dates are stored as their rank among all dates: an integer sort in C that
+    # orders exactly like the date strings, including any left unparsed
+    _, date_rank = np.unique(np.array([c['date'] for c in _comments], dtype=str), return_inverse=True)
+    
+    return {
+        'sentiment': sentiment,
+        # 1 << code (0 when unscored): the sentiment filter is then one AND per comment
+        'sentiment_bit': np.where(sentiment >= 0, np.left_shift(1, sentiment.clip(0)), 0).astype(np.int8),
+        'likes': np.fromiter((c['likes'] for c in _comments), np.int64, count),
+        'reply_count': np.fromiter((c['reply_count'] for c in _comments), np.int64, count),
+        'date': date_rank.reshape(count),
+        'text_lower': [c['text'].lower() for c in _comments]
+    }
+
+@st.cache_data(ttl=600)
+def _filter_sort_comments(_comments, comments_version, sentiment_filter, search_term, sort_option):
+    """
+    Filter and sort comments, cached so pagination clicks only slice the result
+    
+    The comments list itself is not hashed (leading underscore); comments_version
+    identifies it instead.
+    
+    Args:
+        _comments (list): List of comment dictionaries
+        comments_version (str): Identifier of this comments list
+        sentiment_filter (tuple): Lowercase sentiments to keep
+        search_term (str): Text the comments must contain, or empty
+        sort_option (str): Option selected in the sort box
+        
+    Returns:
+        numpy.ndarray: Indices into comments of all matches, in display order
+    """
+    columns = comment_columns(_comments, comments_version)
+    
+    # Filter comments based on selected sentiments
+    wanted_bits = sum(1 << _SENTIMENT_CODES[s] for s in set(sentiment_filter) if s in _SENTIMENT_CODES)
+    filtered = np.flatnonzero(columns['sentiment_bit'] & wanted_bits)
+    
+    # Apply search filter if provided
+    if search_term:
+        search_term_lower = search_term.lower()
+        texts_lower = columns['text_lower']
+        filtered = filtered[np.fromiter(
+            (search_term_lower in texts_lower[i] for i in filtered.tolist()), bool, len(filtered)
+        )]
+    
+    # Sort comments based on selected option (stable, so ties keep their fetch order)
+    field = _SORT_FIELDS.get(sort_option)
+    if field is not None:
+        filtered = filtered[np.argsort(-columns[field][filtered], kind='stable')]
+    
+    # int32 keeps the cached (and pickled) array small
+    return filtered.astype(np.int32)
+
+def render_comments_view(dashboard_data, comments, comments_version):
     """
     Render the comments analysis view showing top comments and statistics
     
     Args:
         dashboard_data (dict): Dashboard data containing metrics and visualizations
         comments (list): List of comment dictionaries
+        comments_version (str): Identifier of the comments list, used as cache key
     """
     st.markdown("## 💬 Comments Analysis")
     
     # Comments statistics in a more visually appealing card layout
-    st.markdown("""
-        <style>
-        .stat-card {
-            padding: 1.2rem;
-            border-radius: 8px;
-            background-color: #f8f9fa;
-            box-shadow: 0 2px 5px rgba(0,0,0,0.1);
-            text-align: center;
-            height: 100%;
-        }
-        .stat-value {
-            font-size: 1.8rem;
-            font-weight: bold;
-            color: #1f77b4;
-            margin-bottom: 0.3rem;
-        }
-        .stat-label {
-            font-size: 0.9rem;
-            color: #555;
-        }
-        .comment-card {
-            padding: 1rem;
-            margin-bottom: 1rem;
-            border-radius: 6px;
-            background-color: white;
-            box-shadow: 0 1px 3px rgba(0,0,0,0.1);
-            border-left: 4px solid;
-        }
-        .comment-header {
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            margin-bottom: 0.5rem;
-        }
-        .comment-author {
-            font-weight: bold;
-            font-size: 1rem;
-        }
-        .comment-details {
-            display: flex;
-            gap: 8px;
-            align-items: center;
-        }
-        .comment-date {
-            color: #777;
-            font-size: 0.8rem;
-        }
-        .sentiment-badge {
-            padding: 3px 8px;
-            border-radius: 12px;
-            font-size: 0.8rem;
-            font-weight: 500;
-        }
-        .comment-text {
-            margin: 0.6rem 0;
-            line-height: 1.4;
-        }
-        .comment-footer {
-            display: flex;
-            gap: 12px;
-            font-size: 0.9rem;
-            color: #555;
-        }
-        .filter-section {
-            background-color: #f8f9fa;
-            padding: 1rem;
-            border-radius: 8px;
-            margin-bottom: 1.5rem;
-        }
-        .pagination-nav {
-            display: flex;
-            justify-content: center;
-            align-items: center;
-            gap: 10px;
-            margin: 20px 0;
-        }
-        </style>
-    """, unsafe_allow_html=True)
+    st.markdown(_COMMENTS_CSS, unsafe_allow_html=True)
     
     st.markdown("### Comment Statistics")
     
@@ -167,97 +341,90 @@ def render_comments_view(dashboard_data, comments):
     st.markdown('</div>', unsafe_allow_html=True)
     
     # Convert filter options to lowercase for matching
-    sentiment_filter = [s.lower() for s in sentiment_filter]
+    sentiment_filter = tuple(s.lower() for s in sentiment_filter)
     
-    # Filter comments based on selected sentiments
-    filtered_comments = [c for c in comments if c['sentiment'] in sentiment_filter]
+    # Results and pagination rerun on their own when the page changes (see _fragment)
+    _render_comment_pages(comments, comments_version, sentiment_filter, search_term, sort_option, comments_per_page)
+
+def _prev_page():
+    """Go to the previous page of comments"""
+    st.session_state.page_number -= 1
+
+def _next_page():
+    """Go to the next page of comments"""
+    st.session_state.page_number += 1
+
+@_fragment
+def _render_comment_pages(comments, comments_version, sentiment_filter, search_term, sort_option, comments_per_page):
+    """
+    Render the filtered comments with pagination controls
     
-    # Apply search filter if provided
-    if search_term:
-        filtered_comments = [c for c in filtered_comments if search_term.lower() in c['text'].lower()]
-        st.markdown(f"Found **{len(filtered_comments)}** comments containing '**{search_term}**'")
+    Args:
+        comments (list): List of comment dictionaries
+        comments_version (str): Identifier of the comments list, used as cache key
+        sentiment_filter (tuple): Lowercase sentiments to show
+        search_term (str): Text the comments must contain, or empty
+        sort_option (str): Option selected in the sort box
+        comments_per_page (int): Number of comments per page
+    """
+    # Initialize session state for pagination if not already done
+    if 'page_number' not in st.session_state:
+        st.session_state.page_number = 1
+    
+    # Filtered and sorted once per filter change; pagination reruns hit the cache
+    filtered_indices = _filter_sort_comments(comments, comments_version, sentiment_filter, search_term, sort_option)
+    total_filtered = len(filtered_indices)
     
-    # Sort comments based on selected option
-    if sort_option == "Most Likes":
-        filtered_comments = sorted(filtered_comments, key=lambda x: x.get('likes', 0), reverse=True)
-    elif sort_option == "Most Recent":
-        filtered_comments = sorted(filtered_comments, key=lambda x: x.get('date', ''), reverse=True)
-    elif sort_option == "Most Replies":
-        filtered_comments = sorted(filtered_comments, key=lambda x: x.get('reply_count', 0), reverse=True)
+    if search_term:
+        st.markdown(f"Found **{total_filtered}** comments containing '**{search_term}**'")
     
     # Show number of comments found
-    total_filtered = len(filtered_comments)
     st.markdown(f"### Showing {total_filtered} comments")
     
     # Improved pagination controls
     total_pages = math.ceil(total_filtered / comments_per_page)
     
-    # Initialize session state for pagination if not already done
-    if 'page_number' not in st.session_state:
-        st.session_state.page_number = 1
-    
     # If we have more than one page of comments, show pagination controls
     if total_pages > 1:
         # Simple page buttons
         cols = st.columns([3, 1, 1, 1, 3])
         
-        # Previous button
-        if cols[1].button("◀ Prev", use_container_width=True, disabled=st.session_state.page_number <= 1):
-            st.session_state.page_number -= 1
-            st.rerun()
+        # Previous button (the callback updates the page before the rerun it triggers)
+        cols[1].button("◀ Prev", use_container_width=True, disabled=st.session_state.page_number <= 1, on_click=_prev_page)
         
         # Page indicator
         cols[2].markdown(f"<div style='text-align:center; padding:10px 0; font-weight:bold;'>{st.session_state.page_number}/{total_pages}</div>", unsafe_allow_html=True)
         
         # Next button
-        if cols[3].button("Next ▶", use_container_width=True, disabled=st.session_state.page_number >= total_pages):
-            st.session_state.page_number += 1
-            st.rerun()
+        cols[3].button("Next ▶", use_container_width=True, disabled=st.session_state.page_number >= total_pages, on_click=_next_page)
         
         # Calculate start and end indices for current page
         start_idx = (st.session_state.page_number - 1) * comments_per_page
         end_idx = min(start_idx + comments_per_page, total_filtered)
         
         # Get comments for current page
-        page_comments = filtered_comments[start_idx:end_idx]
+        page_comments = [comments[i] for i in filtered_indices[start_idx:end_idx].tolist()]
         
         st.markdown(f"<div style='text-align: center; color: #666; margin: 0.5rem 0 1.5rem 0;'>Showing comments {start_idx+1}-{end_idx} of {total_filtered}</div>", unsafe_allow_html=True)
     else:
         # If only one page, show all comments
-        page_comments = filtered_comments
+        page_comments = [comments[i] for i in filtered_indices.tolist()]
         st.session_state.page_number = 1
     
-    # Display comments for current page with enhanced styling and fixed HTML structure
+    # Display comments for current page with enhanced styling and fixed HTML structure,
+    # as one markdown element rather than one per comment
     if page_comments:
-        for comment in page_comments:
-            color = get_sentiment_color(comment['sentiment'])
-            emoji = get_sentiment_emoji(comment['sentiment'])
-            
-            # Format the comment date and name for better readability
-            author_name = comment['author_name']
-            comment_date = comment['date']
-            
-            # Create a unified comment component with fixed HTML structure
-            comment_html = f"""
-                <div class="comment-card" style="border-left-color: {color};">
-                    <div class="comment-header">
-                        <span class="comment-author">@{author_name}</span>
-                        <div class="comment-details">
-                            <span class="comment-date">{comment_date}</span>
-                            <span class="sentiment-badge" style="background-color: {color}20; color: {color};">
-                                {emoji} {comment['sentiment'].capitalize()}
-                            </span>
-                        </div>
-                    </div>
-                    <p class="comment-text">{comment['text']}</p>
-                    <div class="comment-footer">
-                        <span>👍 {comment['likes']} likes</span>
-                        {f"<span>💬 {comment['reply_count']} replies</span>" if comment.get('reply_count', 0) > 0 else ""}
-                    </div>
-                </div>
-            """
-                
-            # Render the comment
-            st.markdown(comment_html, unsafe_allow_html=True)
+        page_html = "".join(
+            _comment_card_html(
+                comment['author_name'],
+                comment['date'],
+                comment['sentiment'],
+                comment['text'],
+                comment['likes'],
+                comment.get('reply_count', 0)
+            )
+            for comment in page_comments
+        )
+        st.markdown(page_html, unsafe_allow_html=True)
     else:
         st.info("No comments found matching your criteria.")
\ No newline at end of file
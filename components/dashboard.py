@@ -3,6 +3,91 @@ import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
+import html
+import textwrap
+from components.comments_view import comment_text_html
+
+# Preview card markup, dedented before the comment text is filled in so multi-line
+# comments cannot break the shared markdown element (see comments_view._COMMENT_CARD_TEMPLATE)
+_PREVIEW_CARD_TEMPLATE = textwrap.dedent("""
+    <div class="comment-card">
+        <div class="comment-header">
+            <span class="comment-author">{author_name}</span>
+            <span class="comment-date">{date}</span>
+        </div>
+        <p class="comment-text">{text}</p>
+        <div class="comment-footer">
+            <span>👍 {likes} likes</span>{replies}
+        </div>
+    </div>
+""").strip() + "\n"
+
+@st.cache_data(max_entries=32)
+def _sentiment_pie(sentiment_items):
+    """
+    Build the sentiment pie chart, cached so reruns reuse the figure
+    
+    Args:
+        sentiment_items (tuple): (name, value) pair per sentiment
+        
+    Returns:
+        plotly.graph_objects.Figure: Pie chart
+    """
+    # Convert sentiment data to DataFrame
+    sentiment_df = pd.DataFrame(sentiment_items, columns=['name', 'value'])
+    
+    # Create pie chart
+    fig = px.pie(
+        sentiment_df, 
+        values='value', 
+        names='name',
+        color='name',
+        color_discrete_map={
+            'Positive': '#4ade80',
+            'Neutral': '#a3a3a3',
+            'Negative': '#f87171'
+        },
+        hole=0.4
+    )
+    
+    fig.update_layout(
+        legend_title_text='Sentiment',
+        legend=dict(orientation='h', yanchor='bottom', y=-0.1, xanchor='center', x=0.5)
+    )
+    
+    return fig
+
+@st.cache_data(max_entries=32)
+def _topic_bar(topic_items):
+    """
+    Build the topic distribution bar chart, cached so reruns reuse the figure
+    
+    Args:
+        topic_items (tuple): (name, value) pair per topic
+        
+    Returns:
+        plotly.graph_objects.Figure: Bar chart
+    """
+    # Convert topic data to DataFrame
+    topic_df = pd.DataFrame(topic_items, columns=['name', 'value'])
+    
+    # Create bar chart
+    fig = px.bar(
+        topic_df,
+        x='name',
+        y='value',
+        color='name',
+        color_discrete_sequence=px.colors.qualitative.Pastel,
+        labels={'name': 'Topic', 'value': 'Count'}
+    )
+    
+    fig.update_layout(
+        xaxis_title='',
+        yaxis_title='Count',
+        showlegend=False
+    )
+    
+    return fig
 
 def render_dashboard(dashboard_data):
     """
@@ -55,52 +140,13 @@ def render_dashboard(dashboard_data):
     with col1:
         st.markdown("### Sentiment Overview")
         
-        # Convert sentiment data to DataFrame
-        sentiment_df = pd.DataFrame(dashboard_data['sentiment_data'])
-        
-        # Create pie chart
-        fig = px.pie(
-            sentiment_df, 
-            values='value', 
-            names='name',
-            color='name',
-            color_discrete_map={
-                'Positive': '#4ade80',
-                'Neutral': '#a3a3a3',
-                'Negative': '#f87171'
-            },
-            hole=0.4
-        )
-        
-        fig.update_layout(
-            legend_title_text='Sentiment',
-            legend=dict(orientation='h', yanchor='bottom', y=-0.1, xanchor='center', x=0.5)
-        )
-        
+        fig = _sentiment_pie(tuple((item['name'], item['value']) for item in dashboard_data['sentiment_data']))
         st.plotly_chart(fig, use_container_width=True)
     
     with col2:
         st.markdown("### Topic Distribution")
         
-        # Convert topic data to DataFrame
-        topic_df = pd.DataFrame(dashboard_data['topic_data'])
-        
-        # Create bar chart
-        fig = px.bar(
-            topic_df,
-            x='name',
-            y='value',
-            color='name',
-            color_discrete_sequence=px.colors.qualitative.Pastel,
-            labels={'name': 'Topic', 'value': 'Count'}
-        )
-        
-        fig.update_layout(
-            xaxis_title='',
-            yaxis_title='Count',
-            showlegend=False
-        )
-        
+        fig = _topic_bar(tuple((item['name'], item['value']) for item in dashboard_data['topic_data']))
         st.plotly_chart(fig, use_container_width=True)
     
     # Content Recommendations
@@ -119,7 +165,7 @@ def render_dashboard(dashboard_data):
                             <span class="idea-star">⭐</span>
                             <span class="idea-title">Trending Idea #{i+1}</span>
                         </div>
-                        <p class="idea-text">{idea['idea']}</p>
+                        <p class="idea-text">{html.escape(idea['idea'])}</p>
                         <div class="idea-engagement">
                             <span>👍 {idea['likes']} engagement points</span>
                         </div>
@@ -134,22 +180,20 @@ def render_dashboard(dashboard_data):
     st.markdown("### 💬 Recent Comments")
     
     if dashboard_data['recent_comments']:
-        for comment in dashboard_data['recent_comments'][:3]:
-            st.markdown(
-                f"""
-                <div class="comment-card">
-                    <div class="comment-header">
-                        <span class="comment-author">{comment['author_name']}</span>
-                        <span class="comment-date">{comment['date']}</span>
-                    </div>
-                    <p class="comment-text">{comment['text']}</p>
-                    <div class="comment-footer">
-                        <span>👍 {comment['likes']} likes</span>
-                        {f"<span>💬 {comment['reply_count']} replies</span>" if comment['reply_count'] > 0 else ""}
-                    </div>
-                </div>
-                """,
-                unsafe_allow_html=True
-            )
+        # One markdown element for all the preview cards (author and text escaped, they
+        # are user content)
+        st.markdown(
+            "".join(
+                _PREVIEW_CARD_TEMPLATE.format(
+                    author_name=html.escape(comment['author_name']),
+                    date=comment['date'],
+                    text=comment_text_html(comment['text']),
+                    likes=comment['likes'],
+                    replies=f" <span>💬 {comment['reply_count']} replies</span>" if comment['reply_count'] > 0 else ""
+                )
+                for comment in dashboard_data['recent_comments'][:3]
+            ),
+            unsafe_allow_html=True
+        )
     else:
         st.info("No comments available to display.")
\ No newline at end of file
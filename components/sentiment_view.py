@@ -3,28 +3,111 @@ import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
-from utils.sentiment import get_sentiment_emoji, get_sentiment_color
+import numpy as np
+import html
+import textwrap
+from utils.sentiment import SENTIMENT_LABELS, get_sentiment_emoji, get_sentiment_color
+from components.comments_view import comment_columns, comment_text_html
 
-def render_sentiment_view(dashboard_data, comments):
+# Card markup, dedented before the comment text is filled in so multi-line comments
+# cannot break the shared markdown element (see comments_view._COMMENT_CARD_TEMPLATE)
+_SENTIMENT_CARD_TEMPLATE = textwrap.dedent("""
+    <div class="comment-card" style="border-left: 4px solid {color};">
+        <div class="comment-header">
+            <span class="comment-author">{author_name}</span>
+            <span class="sentiment-badge" style="background-color: {color}20; color: {color};">
+                {emoji} {sentiment}
+            </span>
+        </div>
+        <p class="comment-text">{text}</p>
+        <div class="comment-footer">
+            <span>👍 {likes} likes</span>{replies}
+        </div>
+    </div>
+""").strip() + "\n"
+
+@st.cache_data(ttl=600)
+def _sentiment_summary(_comments, comments_version, limit=5):
+    """
+    Count comments per sentiment and find each sentiment's most liked comments,
+    cached per comments list
+    
+    Args:
+        _comments (list): List of comment dictionaries (not hashed)
+        comments_version (str): Identifier of this comments list
+        limit (int): Number of top comments to keep per sentiment
+        
+    Returns:
+        tuple: (count per label in SENTIMENT_LABELS order,
+            dict of sentiment label -> indices of its top comments by likes)
+    """
+    columns = comment_columns(_comments, comments_version)
+    scored = np.flatnonzero(columns['sentiment'] >= 0)
+    codes = columns['sentiment'][scored]
+    
+    # One C pass for all three counts
+    counts = np.bincount(codes, minlength=len(SENTIMENT_LABELS))
+    
+    # Group by sentiment, most liked first (lexsort is stable: ties keep fetch
+    # order), then cut each group at its count
+    ranked = scored[np.lexsort((-columns['likes'][scored], codes))]
+    groups = np.split(ranked, np.cumsum(counts)[:-1])
+    
+    return counts.tolist(), {label: group[:limit].tolist() for label, group in zip(SENTIMENT_LABELS, groups)}
+
+@st.cache_data(max_entries=32)
+def _sentiment_donut(sentiment_items):
+    """
+    Build the sentiment distribution donut chart, cached so reruns reuse the figure
+    
+    Args:
+        sentiment_items (tuple): (name, value) pair per sentiment
+        
+    Returns:
+        plotly.graph_objects.Figure: Donut chart
+    """
+    # Convert sentiment data to DataFrame
+    sentiment_df = pd.DataFrame(sentiment_items, columns=['name', 'value'])
+    
+    # Create donut chart
+    fig = go.Figure(data=[go.Pie(
+        labels=sentiment_df['name'],
+        values=sentiment_df['value'],
+        hole=.4,
+        marker_colors=['#4ade80', '#a3a3a3', '#f87171']
+    )])
+    
+    fig.update_layout(
+        annotations=[dict(text='Sentiment', x=0.5, y=0.5, font_size=20, showarrow=False)],
+        showlegend=True,
+        legend=dict(orientation="h", yanchor="bottom", y=-0.1, xanchor="center", x=0.5)
+    )
+    
+    return fig
+
+def render_sentiment_view(dashboard_data, comments, comments_version):
     """
     Render the sentiment analysis view with detailed sentiment charts and top comments by sentiment
     
     Args:
         dashboard_data (dict): Dashboard data containing metrics and visualizations
         comments (list): List of comment dictionaries
+        comments_version (str): Identifier of the comments list, used as cache key
     """
     st.markdown("## 😊 Sentiment Analysis")
     
-    # Sentiment Stats
-    sentiment_data = dashboard_data['sentiment_data']
+    # Sentiment Stats: counts and top comments per sentiment from one cached pass
     total_comments = dashboard_data['basic_stats']['total_comments']
+    counts, top_comments = _sentiment_summary(comments, comments_version)
+    positive_count, neutral_count, negative_count = counts
+    positive_percent, neutral_percent, negative_percent = (
+        count * 100 // total_comments if total_comments else 0 for count in counts
+    )
     
     # Display sentiment metrics in columns
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        positive_count = sentiment_data[0]['value']
-        positive_percent = int((positive_count / total_comments * 100) if total_comments else 0)
         st.markdown(
             f"""
             <div class="metric-card positive">
@@ -37,8 +120,6 @@ def render_sentiment_view(dashboard_data, comments):
         )
     
     with col2:
-        neutral_count = sentiment_data[1]['value']
-        neutral_percent = int((neutral_count / total_comments * 100) if total_comments else 0)
         st.markdown(
             f"""
             <div class="metric-card neutral">
@@ -51,8 +132,6 @@ def render_sentiment_view(dashboard_data, comments):
         )
     
     with col3:
-        negative_count = sentiment_data[2]['value']
-        negative_percent = int((negative_count / total_comments * 100) if total_comments else 0)
         st.markdown(
             f"""
             <div class="metric-card negative">
@@ -67,23 +146,7 @@ def render_sentiment_view(dashboard_data, comments):
     # Sentiment Distribution Chart
     st.markdown("### Sentiment Distribution")
     
-    # Convert sentiment data to DataFrame
-    sentiment_df = pd.DataFrame(dashboard_data['sentiment_data'])
-    
-    # Create donut chart
-    fig = go.Figure(data=[go.Pie(
-        labels=sentiment_df['name'],
-        values=sentiment_df['value'],
-        hole=.4,
-        marker_colors=['#4ade80', '#a3a3a3', '#f87171']
-    )])
-    
-    fig.update_layout(
-        annotations=[dict(text='Sentiment', x=0.5, y=0.5, font_size=20, showarrow=False)],
-        showlegend=True,
-        legend=dict(orientation="h", yanchor="bottom", y=-0.1, xanchor="center", x=0.5)
-    )
-    
+    fig = _sentiment_donut(tuple((item['name'], item['value']) for item in dashboard_data['sentiment_data']))
     st.plotly_chart(fig, use_container_width=True)
     
     # Top Comments by Sentiment
@@ -93,23 +156,23 @@ def render_sentiment_view(dashboard_data, comments):
     tab1, tab2, tab3 = st.tabs(["Positive Comments", "Neutral Comments", "Negative Comments"])
     
     with tab1:
-        positive_comments = [c for c in comments if c['sentiment'] == 'positive']
+        positive_comments = [comments[i] for i in top_comments['positive']]
         if positive_comments:
-            display_comments_by_sentiment(positive_comments[:5], 'positive')
+            display_comments_by_sentiment(positive_comments, 'positive')
         else:
             st.info("No positive comments found.")
     
     with tab2:
-        neutral_comments = [c for c in comments if c['sentiment'] == 'neutral']
+        neutral_comments = [comments[i] for i in top_comments['neutral']]
         if neutral_comments:
-            display_comments_by_sentiment(neutral_comments[:5], 'neutral')
+            display_comments_by_sentiment(neutral_comments, 'neutral')
         else:
             st.info("No neutral comments found.")
     
     with tab3:
-        negative_comments = [c for c in comments if c['sentiment'] == 'negative']
+        negative_comments = [comments[i] for i in top_comments['negative']]
         if negative_comments:
-            display_comments_by_sentiment(negative_comments[:5], 'negative')
+            display_comments_by_sentiment(negative_comments, 'negative')
         else:
             st.info("No negative comments found.")
     
@@ -134,36 +197,28 @@ def render_sentiment_view(dashboard_data, comments):
 
 def display_comments_by_sentiment(comments, sentiment_type):
     """
-    Display comments of a specific sentiment type
+    Display comments of a specific sentiment type, in the order given
     
     Args:
-        comments (list): List of comment dictionaries
+        comments (list): List of comment dictionaries (already ranked by _sentiment_summary)
         sentiment_type (str): Sentiment type ('positive', 'neutral', or 'negative')
     """
-    # Sort comments by likes
-    sorted_comments = sorted(comments, key=lambda x: x.get('likes', 0), reverse=True)
-    
-    # Display each comment
-    for comment in sorted_comments:
-        color = get_sentiment_color(sentiment_type)
-        emoji = get_sentiment_emoji(sentiment_type)
-        
-        # Create HTML for the comment card
-        comment_html = f"""
-        <div class="comment-card" style="border-left: 4px solid {color};">
-            <div class="comment-header">
-                <span class="comment-author">{comment['author_name']}</span>
-                <span class="sentiment-badge" style="background-color: {color}20; color: {color};">
-                    {emoji} {sentiment_type.capitalize()}
-                </span>
-            </div>
-            <p class="comment-text">{comment['text']}</p>
-            <div class="comment-footer">
-                <span>👍 {comment['likes']} likes</span>
-                {f"<span>💬 {comment['reply_count']} replies</span>" if comment.get('reply_count', 0) > 0 else ""}
-            </div>
-        </div>
-        """
-        
-        # Render the HTML safely    
-        st.markdown(comment_html, unsafe_allow_html=True)
\ No newline at end of file
+    color = get_sentiment_color(sentiment_type)
+    emoji = get_sentiment_emoji(sentiment_type)
+    
+    # Build every card, then send them as one markdown element
+    cards = []
+    for comment in comments:
+        # Create HTML for the comment card (author and text escaped, they are user content)
+        cards.append(_SENTIMENT_CARD_TEMPLATE.format(
+            color=color,
+            author_name=html.escape(comment['author_name']),
+            emoji=emoji,
+            sentiment=sentiment_type.capitalize(),
+            text=comment_text_html(comment['text']),
+            likes=comment['likes'],
+            replies=f" <span>💬 {comment['reply_count']} replies</span>" if comment.get('reply_count', 0) > 0 else ""
+        ))
+    
+    # Render the HTML safely
+    st.markdown("".join(cards), unsafe_allow_html=True)
\ No newline at end of file
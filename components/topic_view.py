@@ -2,8 +2,53 @@
 import streamlit as st
 import plotly.express as px
 import pandas as pd
+import html
 from utils.topic_analysis import extract_keywords
 
+# Styles for the content idea cards (sent on every rerun, see comments_view._COMMENTS_CSS)
+_IDEA_CARD_CSS = """
+<style>
+.idea-card {
+    background-color: white;
+    border-radius: 10px;
+    padding: 15px;
+    box-shadow: 0 4px 6px rgba(0,0,0,0.1);
+    margin-bottom: 15px;
+    transition: transform 0.3s;
+    height: 100%;
+}
+.idea-card:hover {
+    transform: translateY(-5px);
+    box-shadow: 0 6px 8px rgba(0,0,0,0.15);
+}
+.idea-header {
+    display: flex;
+    align-items: center;
+    margin-bottom: 10px;
+}
+.idea-star {
+    font-size: 20px;
+    margin-right: 10px;
+    color: #FFD700;
+}
+.idea-title {
+    font-weight: bold;
+    color: #3366cc;
+}
+.idea-text {
+    margin-bottom: 15px;
+    font-size: 16px;
+}
+.idea-engagement {
+    background-color: #f8f9fa;
+    padding: 5px 10px;
+    border-radius: 20px;
+    display: inline-block;
+    font-size: 14px;
+}
+</style>
+"""
+
 def render_topic_view(dashboard_data):
     """
     Render the topic analysis view with topics, content ideas, and keyword analysis
@@ -164,48 +209,7 @@ def render_topic_view(dashboard_data):
             
             # Display ideas in card format with improved styling
             if not filtered_ideas.empty:
-                st.markdown("""
-                <style>
-                .idea-card {
-                    background-color: white;
-                    border-radius: 10px;
-                    padding: 15px;
-                    box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-                    margin-bottom: 15px;
-                    transition: transform 0.3s;
-                    height: 100%;
-                }
-                .idea-card:hover {
-                    transform: translateY(-5px);
-                    box-shadow: 0 6px 8px rgba(0,0,0,0.15);
-                }
-                .idea-header {
-                    display: flex;
-                    align-items: center;
-                    margin-bottom: 10px;
-                }
-                .idea-star {
-                    font-size: 20px;
-                    margin-right: 10px;
-                    color: #FFD700;
-                }
-                .idea-title {
-                    font-weight: bold;
-                    color: #3366cc;
-                }
-                .idea-text {
-                    margin-bottom: 15px;
-                    font-size: 16px;
-                }
-                .idea-engagement {
-                    background-color: #f8f9fa;
-                    padding: 5px 10px;
-                    border-radius: 20px;
-                    display: inline-block;
-                    font-size: 14px;
-                }
-                </style>
-                """, unsafe_allow_html=True)
+                st.markdown(_IDEA_CARD_CSS, unsafe_allow_html=True)
                 
                 # Create columns for each idea using st.columns
                 for i in range(0, len(filtered_ideas), 2):
@@ -222,7 +226,7 @@ def render_topic_view(dashboard_data):
                                         <span class="idea-star">⭐</span>
                                         <span class="idea-title">Content Idea #{i+1}</span>
                                     </div>
-                                    <p class="idea-text">{idea['idea']}</p>
+                                    <p class="idea-text">{html.escape(idea['idea'])}</p>
                                     <div class="idea-engagement">
                                         <span>👍 {idea['likes']} engagement points</span>
                                     </div>
@@ -242,7 +246,7 @@ def render_topic_view(dashboard_data):
                                         <span class="idea-star">⭐</span>
                                         <span class="idea-title">Content Idea #{i+2}</span>
                                     </div>
-                                    <p class="idea-text">{idea['idea']}</p>
+                                    <p class="idea-text">{html.escape(idea['idea'])}</p>
                                     <div class="idea-engagement">
                                         <span>👍 {idea['likes']} engagement points</span>
                                     </div>
@@ -340,7 +344,7 @@ def render_topic_view(dashboard_data):
                         <div style="display: flex; justify-content: space-between; margin-top: 5px;">
                             <span style="background-color: #e6f2ff; padding: 3px 8px; border-radius: 15px; font-size: 12px;">{week_data['type']}</span>
                         </div>
-                        <div style="margin-top: 8px;">{week_data['idea']}</div>
+                        <div style="margin-top: 8px;">{html.escape(week_data['idea'])}</div>
                     </div>
                     """, unsafe_allow_html=True)
                 
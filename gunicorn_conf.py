@@ -0,0 +1,27 @@
+#gunicorn_conf.py
+"""
+Gunicorn settings for serving the Flask API
+
+Usage: gunicorn -c gunicorn_conf.py api:app
+"""
+
+import os
+
+# Listen on the same port the development server uses
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+# Requests mostly wait on the YouTube API, so a few workers with many threads each.
+# Caches and the YOUTUBE_API_MAX_RPS limiter live per worker process: every extra
+# worker adds its own allowance against the shared quota and splits the cache hits.
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 16))
+
+# Import api.py (the sentiment lexicon, stopwords and compiled patterns) once in the
+# master before forking, so workers start warm and share those pages copy-on-write
+preload_app = True
+
+# Fetching every comment of a large video can take a while
+timeout = 120
+graceful_timeout = 30
+keepalive = 5
@@ -3,27 +3,28 @@
 Simplified Sentiment Analysis Module
 
 This module implements a simplified version of sentiment analysis
-using TextBlob as a fallback when transformers aren't available.
+using TextBlob's sentiment lexicon as a fallback when transformers aren't available.
 """
 
+import os
 import re
 import string
 import logging
-from textblob import TextBlob
-import nltk
+import threading
+import xml.etree.ElementTree as ET
+from itertools import chain
+import numpy as np
+import pandas as pd
+import textblob
 from typing import Dict, Any, List
 from functools import lru_cache
+from cachetools import LRUCache
+from utils import sentiment_cache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Try to download necessary NLTK data
-try:
-    nltk.download('punkt', quiet=True)
-except Exception as e:
-    logger.warning(f"Error downloading NLTK data: {e}")
-
 # Define emoji maps for sentiment representation
 SENTIMENT_EMOJIS = {
     'positive': '😊',
@@ -37,11 +38,90 @@ SENTIMENT_COLORS = {
     'neutral': '#a3a3a3'    # Gray
 }
 
-# Sentiment analysis function with caching for better performance
-@lru_cache(maxsize=1024)
+# Label order used by batch_sentiment_codes: code i means SENTIMENT_LABELS[i]
+SENTIMENT_LABELS = ('positive', 'neutral', 'negative')
+_LABEL_ARRAY = np.array(SENTIMENT_LABELS)
+_NEUTRAL_CODE = 1
+
+# Sentiment codes of recently scored texts, shared by every batch call in the process
+# so the same comments requested again (e.g. /api/analyze then /api/sentiment) are not rescored
+_CODE_CACHE = LRUCache(maxsize=200_000)
+_CODE_CACHE_LOCK = threading.Lock()
+
+# Words that flip the polarity of the following word ("not good" = slightly bad)
+NEGATIONS = frozenset({'no', 'not', 'never'})
+
+_TOKEN_RE = re.compile(r"[a-z]+")
+
+# Texts without a single letter (emoji, numbers, punctuation) produce no tokens and
+# are always neutral, so they skip cleaning, tokenizing and the cache entirely.
+# Length is not a shortcut: "ok" is in the lexicon.
+_LETTER_RE = re.compile(r"[a-zA-Z]")
+
+# URLs are dropped; hashtags and mentions keep their text without the # or @
+_CLEAN_RE = re.compile(r"https?://\S+|[#@](\S+)")
+_PUNCT_TABLE = str.maketrans(string.punctuation, " " * len(string.punctuation))
+_WS_RE = re.compile(r"\s+")
+
+def _load_lexicon() -> Dict[str, float]:
+    """
+    Load TextBlob's English sentiment lexicon into a word -> polarity mapping
+    
+    Polarities are averaged over all senses per part-of-speech tag and then over
+    all tags, which matches the untagged lookup TextBlob performs on plain text.
+    
+    Returns:
+        Dictionary mapping words to polarity scores between -1.0 and 1.0
+    """
+    path = os.path.join(os.path.dirname(textblob.__file__), 'en', 'en-sentiment.xml')
+    words: Dict[str, Dict[str, List[float]]] = {}
+    
+    try:
+        for node in ET.parse(path).getroot().iter('word'):
+            form = node.get('form')
+            if form:
+                words.setdefault(form, {}).setdefault(node.get('pos'), []).append(float(node.get('polarity', 0.0)))
+    except (OSError, ET.ParseError) as e:
+        logger.error(f"Error loading sentiment lexicon: {e}")
+        return {}
+    
+    lexicon = {}
+    for form, by_pos in words.items():
+        pos_averages = [sum(values) / len(values) for values in by_pos.values()]
+        lexicon[form] = sum(pos_averages) / len(pos_averages)
+    return lexicon
+
+# Loaded once at import so scoring is a plain dictionary lookup per token
+LEXICON = _load_lexicon()
+_LEXICON_SERIES = pd.Series(LEXICON, dtype='float64')
+_LEXICON_KEYS = frozenset(LEXICON)
+
+def _polarity(tokens: List[str]) -> float:
+    """
+    Compute the mean lexicon polarity of a list of tokens
+    
+    Args:
+        tokens: Lowercase word tokens
+        
+    Returns:
+        Average polarity of the known words, or 0.0 if none are known
+    """
+    lookup = LEXICON.get
+    total = 0.0
+    count = 0
+    negated = False
+    for token in tokens:
+        score = lookup(token)
+        if score is not None:
+            # "not good" = slightly bad, "not bad" = slightly good
+            total += score * -0.5 if negated else score
+            count += 1
+        negated = token in NEGATIONS
+    return total / count if count else 0.0
+
 def analyze_sentiment(text: str) -> str:
     """
-    Analyze sentiment of text using TextBlob
+    Analyze sentiment of text using the TextBlob sentiment lexicon
     
     Args:
         text: Text to analyze
@@ -49,16 +129,32 @@ def analyze_sentiment(text: str) -> str:
     Returns:
         String with sentiment label: 'positive', 'neutral', or 'negative'
     """
-    if not text or not isinstance(text, str):
+    if not text or not isinstance(text, str) or not _LETTER_RE.search(text):
         return "neutral"
     
-    # Clean the text
-    text = clean_text(text)
+    # Clean the text so near-duplicates ("Nice video!" / "nice video") share a cache entry
+    return _analyze_clean(clean_text(text))
+
+# Sentiment scoring with caching for better performance, keyed on cleaned text
+@lru_cache(maxsize=32768)
+def _analyze_clean(text: str) -> str:
+    """
+    Classify already-cleaned text
     
+    Args:
+        text: Output of clean_text
+        
+    Returns:
+        String with sentiment label: 'positive', 'neutral', or 'negative'
+    """
     try:
-        # Use TextBlob for sentiment analysis
-        blob = TextBlob(text)
-        polarity = blob.sentiment.polarity
+        tokens = _TOKEN_RE.findall(text)
+        
+        # Skip scoring when no word is in the lexicon ("first!", emoji-only comments, ...)
+        if _LEXICON_KEYS.isdisjoint(tokens):
+            return "neutral"
+        
+        polarity = _polarity(tokens)
         
         # Classify based on polarity
         if polarity > 0.1:
@@ -84,27 +180,14 @@ def clean_text(text: str) -> str:
     if not isinstance(text, str):
         return ""
     
-    # Convert to lowercase
-    text = text.lower()
-    
-    # Remove URLs
-    text = re.sub(r"https?:\/\/\S+", "", text)
-    
-    # Remove hashtags and mentions (preserve the text without the # or @)
-    text = re.sub(r"#(\S+)", r"\1", text)
-    text = re.sub(r"@(\S+)", r"\1", text)
+    # Lowercase, then strip URLs and hashtag/mention prefixes in a single pass
+    text = _CLEAN_RE.sub(lambda m: m.group(1) or "", text.lower())
     
     # Remove punctuation (except for emojis)
-    for p in string.punctuation:
-        text = text.replace(p, " ")
-    
-    # Replace multiple spaces with a single space
-    text = re.sub(r"\s+", " ", text)
-    
-    # Trim whitespaces at the start and end of the text
-    text = text.strip()
+    text = text.translate(_PUNCT_TABLE)
     
-    return text
+    # Collapse whitespace and trim
+    return _WS_RE.sub(" ", text).strip()
 
 def get_sentiment_emoji(sentiment: str) -> str:
     """
@@ -140,4 +223,98 @@ def batch_analyze_sentiments(texts: List[str]) -> List[str]:
     Returns:
         List of sentiment labels
     """
-    return [analyze_sentiment(text) for text in texts]
\ No newline at end of file
+    return _LABEL_ARRAY[batch_sentiment_codes(texts)].tolist()
+
+def batch_sentiment_codes(texts: List[str]) -> np.ndarray:
+    """
+    Analyze sentiment for a batch of texts as integer codes
+    
+    Codes index SENTIMENT_LABELS (0 positive, 1 neutral, 2 negative), so label
+    counts are np.bincount(codes, minlength=3).
+    
+    Args:
+        texts: List of texts to analyze
+        
+    Returns:
+        int8 array with one sentiment code per text
+    """
+    codes = np.full(len(texts), _NEUTRAL_CODE, dtype=np.int8)
+    
+    # Look up cached codes, grouping uncached texts so repeats are scored once;
+    # non-string texts and texts without letters stay neutral
+    misses: Dict[str, List[int]] = {}
+    with _CODE_CACHE_LOCK:
+        for i, text in enumerate(texts):
+            if isinstance(text, str):
+                code = _CODE_CACHE.get(text)
+                if code is not None:
+                    codes[i] = code
+                elif _LETTER_RE.search(text):
+                    misses.setdefault(text, []).append(i)
+    
+    if misses:
+        # Codes stored on disk by an earlier run, then score only what is left
+        found = sentiment_cache.lookup(list(misses))
+        to_score = [text for text in misses if text not in found]
+        if to_score:
+            scored = dict(zip(to_score, _score_batch(to_score).tolist()))
+            sentiment_cache.store(scored.items())
+            found.update(scored)
+        
+        for text, code in found.items():
+            codes[misses[text]] = code
+        with _CODE_CACHE_LOCK:
+            _CODE_CACHE.update(found)
+    
+    return codes
+
+def _tokenize(text: str) -> List[str]:
+    """
+    Produce the same tokens as _TOKEN_RE.findall(clean_text(text)) with less work
+    
+    Tokens are runs of a-z, so removing punctuation and collapsing whitespace
+    cannot change them; only URL and hashtag/mention handling can, and that
+    regex only runs when the text contains '#', '@' or '://'.
+    
+    Args:
+        text: Raw text
+        
+    Returns:
+        Lowercase word tokens
+    """
+    text = text.lower()
+    if '#' in text or '@' in text or '://' in text:
+        text = _CLEAN_RE.sub(lambda m: m.group(1) or "", text)
+    return _TOKEN_RE.findall(text)
+
+def _score_batch(texts: List[str]) -> np.ndarray:
+    """
+    Score a non-empty batch of texts with vectorized lexicon lookups
+    
+    Args:
+        texts: List of texts to analyze
+        
+    Returns:
+        int8 array with one sentiment code per text
+    """
+    # Tokenize every text once and flatten into a (doc, token) table
+    tokens = [_tokenize(text) if isinstance(text, str) else [] for text in texts]
+    df = pd.DataFrame({
+        'doc': np.repeat(np.arange(len(texts)), [len(t) for t in tokens]),
+        'tok': list(chain.from_iterable(tokens))
+    })
+    
+    # Look up all polarities at once and apply negation from the preceding token of the same doc
+    df['p'] = df['tok'].map(_LEXICON_SERIES)
+    negated = df['tok'].shift().isin(NEGATIONS) & (df['doc'].shift() == df['doc'])
+    df.loc[negated, 'p'] *= -0.5
+    
+    # Unknown tokens are NaN and skipped by mean(); docs without known words score 0.0
+    polarities = (
+        df.groupby('doc')['p'].mean()
+        .reindex(range(len(texts)))
+        .fillna(0.0)
+        .to_numpy()
+    )
+    
+    return np.where(polarities > 0.1, 0, np.where(polarities < -0.1, 2, 1)).astype(np.int8)
\ No newline at end of file
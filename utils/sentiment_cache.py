@@ -0,0 +1,127 @@
+#sentiment_cache.py
+"""
+Persistent Sentiment Cache
+
+Stores sentiment codes in a SQLite database keyed by the SHA-1 of the comment
+text, so comments scored in an earlier run (or another process) are not scored
+again. The cache is opt-in: it is only used when SENTIMENT_CACHE_PATH is set. Any
+database error is logged and treated as a cache miss.
+"""
+
+import os
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Project root, so a relative SENTIMENT_CACHE_PATH does not depend on the working directory
+_PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Database location; the cache is disabled unless SENTIMENT_CACHE_PATH is set
+CACHE_PATH = os.getenv('SENTIMENT_CACHE_PATH', '')
+if CACHE_PATH:
+    CACHE_PATH = os.path.join(_PROJECT_DIR, os.path.expanduser(CACHE_PATH))
+
+# Bump the table version whenever the scoring (lexicon, thresholds, tokenizing) changes
+_TABLE = 'sentiment_codes_v1'
+
+# Stay below SQLite's default limit on bound parameters per statement
+_QUERY_CHUNK = 500
+
+# One connection per process, shared by every thread; _lock serializes its use, so
+# no per-thread connections are left open when pool or script threads exit
+_connection = None
+_lock = threading.Lock()
+
+def _connect():
+    """
+    Return the shared connection, creating the database on first use
+    
+    Must be called with _lock held.
+    
+    Returns:
+        sqlite3.Connection or None: Connection, or None if the cache is disabled or unavailable
+    """
+    global _connection
+    
+    if not CACHE_PATH:
+        return None
+    
+    if _connection is None:
+        try:
+            os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+            connection = sqlite3.connect(CACHE_PATH, timeout=5, check_same_thread=False)
+            # WAL lets readers in other threads/processes proceed while one writes
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(f'CREATE TABLE IF NOT EXISTS {_TABLE} (hash BLOB PRIMARY KEY, code INTEGER NOT NULL) WITHOUT ROWID')
+        except sqlite3.Error as e:
+            logger.error(f"Error opening sentiment cache at {CACHE_PATH}: {e}")
+            return None
+        _connection = connection
+    
+    return _connection
+
+def _hash(text: str) -> bytes:
+    """Cache key for a text: its SHA-1 digest"""
+    return hashlib.sha1(text.encode('utf-8', 'surrogatepass')).digest()
+
+def lookup(texts: List[str]) -> Dict[str, int]:
+    """
+    Fetch stored sentiment codes for a list of texts
+    
+    Args:
+        texts: Distinct texts to look up
+    
+    Returns:
+        Dictionary mapping each text found in the cache to its code
+    """
+    if not CACHE_PATH or not texts:
+        return {}
+    
+    by_hash = {_hash(text): text for text in texts}
+    hashes = list(by_hash)
+    found = {}
+    
+    with _lock:
+        connection = _connect()
+        if connection is None:
+            return {}
+        
+        try:
+            for start in range(0, len(hashes), _QUERY_CHUNK):
+                chunk = hashes[start:start + _QUERY_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                for digest, code in connection.execute(f'SELECT hash, code FROM {_TABLE} WHERE hash IN ({placeholders})', chunk):
+                    found[by_hash[digest]] = code
+        except sqlite3.Error as e:
+            logger.error(f"Error reading sentiment cache: {e}")
+    
+    return found
+
+def store(items: Iterable[Tuple[str, int]]) -> None:
+    """
+    Save sentiment codes for texts
+    
+    Args:
+        items: (text, code) pairs
+    """
+    if not CACHE_PATH:
+        return
+    
+    rows = [(_hash(text), code) for text, code in items]
+    
+    with _lock:
+        connection = _connect()
+        if connection is None:
+            return
+        
+        try:
+            with connection:
+                connection.executemany(f'INSERT OR REPLACE INTO {_TABLE} (hash, code) VALUES (?, ?)', rows)
+        except sqlite3.Error as e:
+            logger.error(f"Error writing sentiment cache: {e}")
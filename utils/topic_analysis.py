@@ -1,19 +1,18 @@
 #topic_analysis.py
 import re
+import heapq
 from collections import Counter
 import nltk
 from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-import pandas as pd
 import logging
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional
+from utils.youtube_api import to_int
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 # Try to download required NLTK data
 try:
-    nltk.download('punkt', quiet=True)
     nltk.download('stopwords', quiet=True)
 except Exception as e:
     logger.warning(f"NLTK download failed: {str(e)}")
@@ -27,12 +26,77 @@ TOPIC_KEYWORDS = {
     'technical': ['technical', 'software', 'hardware', 'settings', 'configuration', 'setup']
 }
 
-def extract_topics(comments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+# Custom stopwords specific to YouTube comments
+_CUSTOM_STOPWORDS = frozenset({
+    'video', 'youtube', 'channel', 'subscribe', 'like', 'comment',
+    'watch', 'watching', 'watched', 'thanks', 'thank', 'please',
+    'great', 'good', 'best', 'love', 'really', 'just', 'make',
+    'made', 'making', 'now', 'get', 'one', 'would', 'could'
+})
+
+def _load_stopwords():
+    """Return NLTK's English stopwords, or a minimal list if the corpus is unavailable"""
+    try:
+        return stopwords.words('english')
+    except LookupError:
+        # NLTK data might not be downloaded
+        logger.warning("NLTK stopwords not found. Using minimal stopword list.")
+        return ["the", "and", "is", "in", "it", "to", "that", "of", "for", "with", "on", "at", "this", "be", "are", "was"]
+
+# Built once at import instead of on every extract_keywords call
+_STOPWORDS = frozenset(_load_stopwords()) | _CUSTOM_STOPWORDS
+
+# Phrases that introduce a content request in a comment
+REQUEST_PATTERNS = [
+    'can you make',
+    'would like to see',
+    'please make',
+    'should do',
+    'next video',
+    'tutorial on',
+    'comparison',
+    'review of'
+]
+
+# The suggestion after a request phrase: everything up to the first punctuation
+_SUGGESTION_RE = re.compile(r"[^.!?]*")
+
+# Keywords are alphabetic runs of 3+ letters, in any script (word characters that are
+# neither digits nor underscores)
+_TOK_RE = re.compile(r"[^\W\d_]{3,}")
+
+# A stripped suggestion has at least two words if it contains any whitespace
+_WS_RE = re.compile(r"\s")
+
+# One compiled alternation per topic so each comment is scanned once per topic
+_TOPIC_PATTERNS = {
+    topic: re.compile('|'.join(map(re.escape, keywords)))
+    for topic, keywords in TOPIC_KEYWORDS.items()
+}
+
+def preprocess(comments: List[Dict[str, Any]]) -> List[str]:
+    """
+    Lowercase every comment text once so the extractors can share it
+    
+    Args:
+        comments (list): List of comment dictionaries
+    
+    Returns:
+        list: Lowercased text per comment ('' where text is missing or not a string)
+    """
+    texts_lower = []
+    for comment in comments:
+        text = comment.get('text', '')
+        texts_lower.append(text.lower() if isinstance(text, str) else '')
+    return texts_lower
+
+def extract_topics(comments: List[Dict[str, Any]], texts_lower: Optional[List[str]] = None) -> List[Dict[str, Any]]:
     """
     Extract common topics from comments using predefined categories
     
     Args:
         comments (list): List of comment dictionaries
+        texts_lower (list, optional): Output of preprocess(comments); computed if not given
     
     Returns:
         list: List of topic dictionaries with name and value
@@ -48,16 +112,12 @@ def extract_topics(comments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         'technical': 0
     }
     
-    for comment in comments:
-        # Extract text and handle case where text might be missing
-        text = comment.get('text', '')
-        if not isinstance(text, str):
-            continue
-            
-        text = text.lower()
-        
-        for topic, keywords in TOPIC_KEYWORDS.items():
-            if any(keyword in text for keyword in keywords):
+    if texts_lower is None:
+        texts_lower = preprocess(comments)
+    
+    for text in texts_lower:
+        for topic, pattern in _TOPIC_PATTERNS.items():
+            if pattern.search(text):
                 topics[topic] += 1
     
     # Check if all values are zero
@@ -70,13 +130,14 @@ def extract_topics(comments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     # Convert to list format for visualization
     return [{'name': key, 'value': value} for key, value in topics.items()]
 
-def generate_content_ideas(comments: List[Dict[str, Any]], max_ideas: int = 10) -> List[Dict[str, Any]]:
+def generate_content_ideas(comments: List[Dict[str, Any]], max_ideas: int = 10, texts_lower: Optional[List[str]] = None) -> List[Dict[str, Any]]:
     """
     Generate content ideas based on user comments
     
     Args:
         comments (list): List of comment dictionaries
         max_ideas (int): Maximum number of ideas to generate
+        texts_lower (list, optional): Output of preprocess(comments); computed if not given
     
     Returns:
         list: List of content idea dictionaries
@@ -89,58 +150,38 @@ def generate_content_ideas(comments: List[Dict[str, Any]], max_ideas: int = 10)
     if comments and len(comments) > 0:
         logger.info(f"Sample comment structure in generate_content_ideas: {list(comments[0].keys())}")
     
-    request_patterns = [
-        'can you make',
-        'would like to see',
-        'please make',
-        'should do',
-        'next video',
-        'tutorial on',
-        'comparison',
-        'review of'
-    ]
-    
     content_ideas = []
     
-    for comment in comments:
-        # Ensure 'text' is present and a string
-        if 'text' not in comment or not isinstance(comment.get('text', ''), str):
+    if texts_lower is None:
+        texts_lower = preprocess(comments)
+    
+    for comment, text in zip(comments, texts_lower):
+        if not text:
             continue
-            
-        text = comment.get('text', '').lower()
-        
-        # Get likes with a default value of 0
-        likes = comment.get('likes', 0)
         
-        # Ensure likes is an integer
-        if not isinstance(likes, (int, float)):
-            try:
-                likes = int(likes)
-            except (ValueError, TypeError):
-                likes = 0
+        # Get likes as an integer with a default value of 0
+        likes = to_int(comment.get('likes', 0))
         
-        for pattern in request_patterns:
-            if pattern in text:
-                # Find where the pattern occurs
-                index = text.find(pattern) + len(pattern)
-                
-                # Extract the suggestion text after the pattern
-                suggestion = text[index:].strip()
-                
-                # Clean up the suggestion by removing everything after the first punctuation
-                suggestion = re.sub(r'[.!?].*$', '', suggestion).strip()
+        for pattern in REQUEST_PATTERNS:
+            # Find where the first occurrence of the pattern ends
+            index = text.find(pattern)
+            if index < 0:
+                continue
+            
+            # Extract the suggestion text after the pattern, up to the first punctuation
+            suggestion = _SUGGESTION_RE.match(text, index + len(pattern)).group().strip()
+            
+            # Only include suggestions that are meaningful
+            if len(suggestion) > 3 and _WS_RE.search(suggestion):
+                # Capitalize the first letter
+                suggestion = suggestion[0].upper() + suggestion[1:]
                 
-                # Only include suggestions that are meaningful
-                if len(suggestion) > 3 and len(suggestion.split()) >= 2:
-                    # Capitalize the first letter
-                    suggestion = suggestion[0].upper() + suggestion[1:]
-                    
-                    # Add to content ideas with engagement metrics
-                    content_ideas.append({
-                        'idea': suggestion,
-                        'likes': likes,
-                        'source': comment.get('id', '')
-                    })
+                # Add to content ideas with engagement metrics
+                content_ideas.append({
+                    'idea': suggestion,
+                    'likes': likes,
+                    'source': comment.get('id', '')
+                })
     
     try:
         # Check if content_ideas is empty
@@ -149,41 +190,29 @@ def generate_content_ideas(comments: List[Dict[str, Any]], max_ideas: int = 10)
             # Return a default idea to prevent empty visualizations
             return [{'idea': 'No content ideas found in comments', 'likes': 0, 'source': ''}]
             
-        # Convert to DataFrame for processing
-        ideas_df = pd.DataFrame(content_ideas)
-        
-        # Debug the DataFrame structure
-        logger.info(f"Content ideas DataFrame columns: {ideas_df.columns.tolist()}")
-        
-        # Check if 'likes' column exists
-        if 'likes' not in ideas_df.columns:
-            logger.warning("'likes' column not found in content ideas DataFrame")
-            # Add a default 'likes' column if missing
-            ideas_df['likes'] = 0
+        # Remove duplicates, keeping the most liked occurrence of each idea
+        best_ideas = {}
+        for idea in content_ideas:
+            previous = best_ideas.get(idea['idea'])
+            if previous is None or idea['likes'] > previous['likes']:
+                best_ideas[idea['idea']] = idea
         
-        # Sort, remove duplicates, and limit to max_ideas
-        result = (
-            ideas_df
-            .sort_values('likes', ascending=False)
-            .drop_duplicates(subset=['idea'])
-            .head(max_ideas)
-            .to_dict('records')
-        )
-        
-        return result
+        # Keep the max_ideas most liked ideas
+        return heapq.nlargest(max_ideas, best_ideas.values(), key=lambda idea: idea['likes'])
         
     except Exception as e:
         logger.error(f"Error processing content ideas: {str(e)}", exc_info=True)
         # Return a default idea to prevent empty visualizations
         return [{'idea': 'Error processing content ideas', 'likes': 0, 'source': ''}]
 
-def extract_keywords(comments: List[Dict[str, Any]], top_n: int = 10) -> List[Tuple[str, int]]:
+def extract_keywords(comments: List[Dict[str, Any]], top_n: int = 10, texts_lower: Optional[List[str]] = None) -> List[Tuple[str, int]]:
     """
     Extract most common keywords from comments
     
     Args:
         comments (list): List of comment dictionaries
         top_n (int): Number of top keywords to return
+        texts_lower (list, optional): Output of preprocess(comments); computed if not given
     
     Returns:
         list: List of (keyword, count) tuples
@@ -193,42 +222,19 @@ def extract_keywords(comments: List[Dict[str, Any]], top_n: int = 10) -> List[Tu
         return [('nodata', 1)]
         
     try:
-        # Get English stopwords
-        try:
-            stop_words = set(stopwords.words('english'))
-        except LookupError:
-            # NLTK data might not be downloaded
-            logger.warning("NLTK stopwords not found. Using minimal stopword list.")
-            stop_words = {"the", "and", "is", "in", "it", "to", "that", "of", "for", "with", "on", "at", "this", "be", "are", "was"}
-        
-        # Add custom stopwords specific to YouTube comments
-        custom_stopwords = {
-            'video', 'youtube', 'channel', 'subscribe', 'like', 'comment',
-            'watch', 'watching', 'watched', 'thanks', 'thank', 'please',
-            'great', 'good', 'best', 'love', 'really', 'just', 'make',
-            'made', 'making', 'now', 'get', 'one', 'would', 'could'
-        }
+        if texts_lower is None:
+            texts_lower = preprocess(comments)
         
-        stop_words.update(custom_stopwords)
-        
-        # Combine all comment texts
-        all_text = ' '.join([comment.get('text', '') for comment in comments if isinstance(comment.get('text', ''), str)])
-        
-        if not all_text.strip():
+        if not any(text.strip() for text in texts_lower):
             return [('nodata', 1)]
             
         try:
-            # Tokenize and filter words
-            tokens = word_tokenize(all_text.lower())
-            
-            # Remove stopwords, punctuation, and short words
-            filtered_tokens = [
-                word for word in tokens 
-                if word.isalpha() and word not in stop_words and len(word) > 2
-            ]
-            
-            # Count word frequencies
-            word_freq = Counter(filtered_tokens)
+            # Count alphabetic words of 3+ letters in one scan over all comments
+            # (a word never spans the joining newline), then drop the stopwords
+            # from the counts instead of testing every token
+            word_freq = Counter(_TOK_RE.findall("\n".join(texts_lower)))
+            for word in _STOPWORDS.intersection(word_freq):
+                del word_freq[word]
             
             # Return top N keywords or a default if none found
             results = word_freq.most_common(top_n)
@@ -244,4 +250,23 @@ def extract_keywords(comments: List[Dict[str, Any]], top_n: int = 10) -> List[Tu
             
     except Exception as e:
         logger.error(f"Error extracting keywords: {str(e)}")
-        return [('error', 1)]  # Return a default to prevent visualization errors
\ No newline at end of file
+        return [('error', 1)]  # Return a default to prevent visualization errors
+
+def analyze_text_bundle(comments: List[Dict[str, Any]], top_n_keywords: int = 20, max_ideas: int = 10) -> Dict[str, Any]:
+    """
+    Extract topics, content ideas and keywords from one shared preprocessing pass
+    
+    Args:
+        comments (list): List of comment dictionaries
+        top_n_keywords (int): Number of top keywords to return
+        max_ideas (int): Maximum number of content ideas to return
+    
+    Returns:
+        dict: Dictionary with 'topics', 'ideas' and 'keywords' results
+    """
+    texts_lower = preprocess(comments)
+    return {
+        'topics': extract_topics(comments, texts_lower=texts_lower),
+        'ideas': generate_content_ideas(comments, max_ideas=max_ideas, texts_lower=texts_lower),
+        'keywords': extract_keywords(comments, top_n=top_n_keywords, texts_lower=texts_lower)
+    }
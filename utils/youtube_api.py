@@ -1,10 +1,18 @@
 #youtube_api.py
 import os
+import re
+import html
+import string
+import orjson
 import requests
 import time
 import logging
-from datetime import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -13,102 +21,281 @@ logger = logging.getLogger(__name__)
 # Load environment variables from .env file
 load_dotenv()
 
-def fetch_comments(video_id, max_results=100, page_token=None):
+COMMENT_THREADS_URL = "https://www.googleapis.com/youtube/v3/commentThreads"
+
+# Partial response mask for videos.list: only what extract_video_statistics reads
+VIDEO_FIELDS = "items(snippet(title,channelTitle,publishedAt,description),statistics(viewCount,likeCount,commentCount))"
+
+# Partial response mask: only the fields _parse_comments and the pagination read,
+# which leaves out etags, kinds, channel/video IDs, textOriginal and similar
+COMMENT_THREADS_FIELDS = (
+    "nextPageToken,pageInfo/totalResults,"
+    "items(id,snippet(totalReplyCount,topLevelComment/snippet("
+    "authorDisplayName,authorChannelUrl,authorProfileImageUrl,textDisplay,likeCount,publishedAt)))"
+)
+
+# Line breaks that can survive in textDisplay ("<br>", "<br/>", "<br />") and the
+# non-breaking spaces html.unescape produces for &nbsp;
+_BR_RE = re.compile(r"(<br\s*/?>)|\xa0")
+
+def _html_break(match):
+    return "\n" if match.group(1) else " "
+
+# Watch, embed, short and live URLs in one alternation, plus the characters of a bare ID
+# (ASCII-only, like the IDs themselves)
+_VIDEO_ID_RE = re.compile(
+    r'(?:youtube\.com\/(?:[^\/\n\s]+\/\S+\/|(?:v|e(?:mbed)?)\/|\S*?[?&]v=)|youtu\.be\/|youtube\.com\/shorts\/|youtube\.com\/live\/)([a-zA-Z0-9_-]{11})',
+    re.ASCII
+)
+_VIDEO_ID_CHARS = frozenset(string.ascii_letters + string.digits + '_-')
+
+# Shared keep-alive session so repeated calls reuse the TLS connection to googleapis.com.
+# The pool is sized for concurrent API requests (each with its page prefetch thread)
+# so connections are kept rather than discarded when more than a few are in flight.
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=(500, 502, 503, 504), allowed_methods=frozenset(["GET"]))
+))
+
+# Global cap on YouTube API requests per second across all threads (0 disables it)
+MAX_REQUESTS_PER_SECOND = float(os.getenv('YOUTUBE_API_MAX_RPS', 10))
+_RATE_LOCK = threading.Lock()
+_next_request_at = 0.0
+
+def _wait_for_rate_limit():
+    """Block until the next API request is allowed under MAX_REQUESTS_PER_SECOND"""
+    global _next_request_at
+    
+    if MAX_REQUESTS_PER_SECOND <= 0:
+        return
+    
+    # Reserve the next slot under the lock, then sleep outside it
+    with _RATE_LOCK:
+        now = time.monotonic()
+        wait = _next_request_at - now
+        _next_request_at = max(now, _next_request_at) + 1.0 / MAX_REQUESTS_PER_SECOND
+    
+    if wait > 0:
+        time.sleep(wait)
+
+# Rate-limit responses are retried with exponential backoff (or the Retry-After delay).
+# A 403 is only retried for these reasons; quotaExceeded lasts until the daily reset.
+MAX_RATE_LIMIT_RETRIES = 5
+_MAX_BACKOFF_SECONDS = 32
+_RATE_LIMIT_REASONS = frozenset({'rateLimitExceeded', 'userRateLimitExceeded'})
+
+def _is_rate_limited(response):
+    """Whether a response is a retryable 429/403 rate-limit error"""
+    if response.status_code == 429:
+        return True
+    if response.status_code != 403:
+        return False
+    
+    try:
+        errors = orjson.loads(response.content)["error"]["errors"]
+        return any(error.get("reason") in _RATE_LIMIT_REASONS for error in errors)
+    except (orjson.JSONDecodeError, KeyError, TypeError, AttributeError):
+        return False
+
+def _backoff_delay(response, attempt):
+    """Seconds to wait before retrying: Retry-After if given, else 1, 2, 4, ... capped"""
+    try:
+        delay = float(response.headers.get("Retry-After", ""))
+    except ValueError:
+        delay = 2 ** attempt
+    return min(max(delay, 0), _MAX_BACKOFF_SECONDS)
+
+def _pause_requests(delay):
+    """Hold back every thread's next request by delay seconds"""
+    global _next_request_at
+    
+    with _RATE_LOCK:
+        _next_request_at = max(_next_request_at, time.monotonic() + delay)
+
+def _get_json(url, params, timeout):
     """
-    Fetch comments from a YouTube video using the API key
+    GET a YouTube API endpoint under the rate limit, backing off on rate-limit errors
     
     Args:
-        video_id (str): YouTube video ID
-        max_results (int): Maximum number of comments to fetch
-        page_token (str, optional): Token for pagination
+        url (str): Endpoint URL
+        params (dict): Query parameters
+        timeout (float): Request timeout in seconds
         
     Returns:
-        dict: Dictionary with comments and metadata
+        dict: Parsed JSON response
+        
+    Raises:
+        requests.HTTPError: If the request fails, or is still rate limited after all retries
+    """
+    for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+        _wait_for_rate_limit()
+        response = SESSION.get(url, params=params, timeout=timeout)
+        
+        if attempt == MAX_RATE_LIMIT_RETRIES or not _is_rate_limited(response):
+            break
+        
+        delay = _backoff_delay(response, attempt)
+        logger.warning(f"YouTube API rate limit hit (HTTP {response.status_code}); retrying in {delay:g}s")
+        _pause_requests(delay)
+        time.sleep(delay)
+    
+    # Handle response errors
+    response.raise_for_status()
+    
+    return orjson.loads(response.content)
+
+# Function to extract YouTube video ID (repeated URLs skip parsing entirely)
+@lru_cache(maxsize=1024)
+def extract_video_id(url):
+    """Extract the YouTube video ID from various URL formats"""
+    if not url:
+        return None
+    
+    # Check if the input is directly a video ID (11 characters)
+    if len(url) == 11 and _VIDEO_ID_CHARS.issuperset(url):
+        return url
+    
+    # Every supported URL form contains youtube.com or youtu.be
+    if 'youtu' not in url:
+        return None
+    
+    match = _VIDEO_ID_RE.search(url)
+    if match:
+        return match.group(1)
+        
+    return None
+
+def to_int(value, default=0):
+    """Convert an API count (usually a numeric string) or like count to int, falling back to default"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+def _get_api_key():
+    """
+    Read the YouTube API key from the environment
+    
+    Returns:
+        str: API key
+        
+    Raises:
+        ValueError: If the API key is missing or still the placeholder
     """
-    # Get API key directly from environment variables
     api_key = os.getenv('YOUTUBE_API_KEY')
     
-    # Validate API key
     if not api_key or api_key == 'YOUR_API_KEY':
         error_msg = "YouTube API key not found or not set. Please add it to your .env file."
         logger.error(error_msg)
         raise ValueError(error_msg)
     
-    # Initialize empty list for comments
-    comments = []
-    
-    # Build the parameters for the API request - API key is included in the params
+    return api_key
+
+def _comment_params(video_id, api_key, max_results=100, page_token=None, search_terms=None):
+    """Build the commentThreads request parameters for one page (optionally filtered by searchTerms)"""
     params = {
         "part": "snippet",
         "videoId": video_id,
         "maxResults": min(max_results, 100),  # API max is 100 per request
         "key": api_key,
-        "textFormat": "plainText"  # Get plain text rather than HTML
+        "textFormat": "plainText",  # Get plain text rather than HTML
+        "fields": COMMENT_THREADS_FIELDS
     }
     
     # Add page token if provided (for pagination)
     if page_token:
         params["pageToken"] = page_token
     
-    try:
-        # Log the API request (without exposing the key)
-        logger.info(f"Making YouTube API request for comments with video ID: {video_id}")
+    # Only return comments matching these terms
+    if search_terms:
+        params["searchTerms"] = search_terms
+    
+    return params
+
+def _fetch_page(params):
+    """
+    Request one page of comment threads
+    
+    Args:
+        params (dict): Request parameters from _comment_params
+        
+    Returns:
+        dict: Raw JSON response
+    """
+    # Log the API request (without exposing the key)
+    logger.info(f"Making YouTube API request for comments with video ID: {params['videoId']}")
+    
+    return _get_json(COMMENT_THREADS_URL, params, timeout=15)
+
+def _parse_comments(data):
+    """
+    Convert a raw commentThreads response into comment dictionaries
+    
+    Args:
+        data (dict): Raw JSON response
+        
+    Returns:
+        list: List of comment dictionaries
+    """
+    comments = []
+    
+    for item in data.get("items", []):
+        comment_snippet = item["snippet"]["topLevelComment"]["snippet"]
         
-        # Make the API request using only the key in params (no URL)
-        response = requests.get(
-            "https://www.googleapis.com/youtube/v3/commentThreads",
-            params=params,
-            timeout=15
-        )
+        # Format the date: publishedAt is always ISO 8601 UTC ("2024-01-31T12:34:56Z")
+        date_str = comment_snippet.get("publishedAt", "")
+        if len(date_str) >= 19:
+            formatted_date = date_str[:10] + " " + date_str[11:19]
+        else:
+            formatted_date = date_str
+            logger.warning(f"Could not parse date: {date_str}")
         
-        # Handle response errors
-        response.raise_for_status()
+        # Clean up text from HTML if needed (entities such as &amp; and &nbsp; included)
+        text = _BR_RE.sub(_html_break, html.unescape(comment_snippet.get("textDisplay", "")))
+        
+        # Create the comment object
+        comment = {
+            "id": item["id"],
+            "author_name": comment_snippet.get("authorDisplayName", "Anonymous"),
+            "author_channel_url": comment_snippet.get("authorChannelUrl", ""),
+            "author_profile_image": comment_snippet.get("authorProfileImageUrl", ""),
+            "text": text,
+            "likes": to_int(comment_snippet.get("likeCount", 0)),
+            "date": formatted_date,
+            "reply_count": to_int(item["snippet"].get("totalReplyCount", 0))
+        }
+        
+        comments.append(comment)
+    
+    return comments
+
+def fetch_comments(video_id, max_results=100, page_token=None):
+    """
+    Fetch comments from a YouTube video using the API key
+    
+    Args:
+        video_id (str): YouTube video ID
+        max_results (int): Maximum number of comments to fetch
+        page_token (str, optional): Token for pagination
         
-        # Parse the JSON response
-        data = response.json()
+    Returns:
+        dict: Dictionary with comments and metadata
+    """
+    api_key = _get_api_key()
+    params = _comment_params(video_id, api_key, max_results, page_token)
+    
+    try:
+        data = _fetch_page(params)
         
         # Process the comments
         if "items" in data and len(data["items"]) > 0:
             logger.info(f"Successfully retrieved {len(data['items'])} comments")
             
-            for item in data["items"]:
-                comment_snippet = item["snippet"]["topLevelComment"]["snippet"]
-                
-                # Parse the date
-                date_str = comment_snippet.get("publishedAt", "")
-                try:
-                    date_obj = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
-                    formatted_date = date_obj.strftime("%Y-%m-%d %H:%M:%S")
-                except (ValueError, AttributeError):
-                    formatted_date = date_str
-                    logger.warning(f"Could not parse date: {date_str}")
-                
-                # Clean up text from HTML if needed
-                text = comment_snippet.get("textDisplay", "")
-                text = text.replace("<br>", "\n").replace("&nbsp;", " ")
-                
-                # Create the comment object
-                try:
-                    like_count = int(comment_snippet.get("likeCount", 0))
-                except (ValueError, TypeError):
-                    like_count = 0
-                    
-                comment = {
-                    "id": item["id"],
-                    "author_name": comment_snippet.get("authorDisplayName", "Anonymous"),
-                    "author_channel_url": comment_snippet.get("authorChannelUrl", ""),
-                    "author_profile_image": comment_snippet.get("authorProfileImageUrl", ""),
-                    "text": text,
-                    "likes": like_count,
-                    "date": formatted_date,
-                    "reply_count": item["snippet"].get("totalReplyCount", 0)
-                }
-                
-                comments.append(comment)
-            
             # Return comments and metadata
             return {
-                "comments": comments,
+                "comments": _parse_comments(data),
                 "metadata": {
                     "nextPageToken": data.get("nextPageToken"),
                     "totalResults": data.get("pageInfo", {}).get("totalResults", 0)
@@ -129,6 +316,57 @@ def fetch_comments(video_id, max_results=100, page_token=None):
         logger.error(f"Error fetching comments: {e}")
         raise ValueError(f"Error accessing YouTube API: {str(e)}")
 
+def iter_comment_pages(video_id, max_results=None, search_terms=None):
+    """
+    Yield pages of comments, requesting the next page while the current one is processed
+    
+    Pages are chained by nextPageToken, so the following request is submitted
+    to a worker thread as soon as a page arrives and the page is parsed (and
+    handed to the caller) while that request is in flight.
+    
+    Args:
+        video_id (str): YouTube video ID
+        max_results (int, optional): Maximum number of comments to fetch. If None, fetches all.
+        search_terms (str, optional): Only fetch comments matching these terms (commentThreads searchTerms)
+        
+    Yields:
+        list: List of comment dictionaries for each page
+        
+    Raises:
+        ValueError: If API key is not configured or an API request fails
+    """
+    api_key = _get_api_key()
+    params = _comment_params(video_id, api_key, search_terms=search_terms)
+    fetched = 0
+    
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        try:
+            data = _fetch_page(params)
+            
+            while True:
+                fetched += len(data.get("items", []))
+                next_page_token = data.get("nextPageToken")
+                
+                # Request the next page before parsing this one
+                next_page = None
+                if next_page_token and (max_results is None or fetched < max_results):
+                    next_page = executor.submit(_fetch_page, {**params, "pageToken": next_page_token})
+                
+                page_comments = _parse_comments(data)
+                if not page_comments:
+                    return
+                
+                yield page_comments
+                
+                if next_page is None:
+                    return
+                
+                data = next_page.result()
+                
+        except requests.RequestException as e:
+            logger.error(f"Error fetching comments: {e}")
+            raise ValueError(f"Error accessing YouTube API: {str(e)}")
+
 def extract_video_statistics(video_id):
     """
     Fetch basic statistics for a YouTube video
@@ -151,21 +389,15 @@ def extract_video_statistics(video_id):
     params = {
         "part": "snippet,statistics",
         "id": video_id,
-        "key": api_key
+        "key": api_key,
+        "fields": VIDEO_FIELDS
     }
     
     try:
         logger.info(f"Making YouTube API request for video statistics with video ID: {video_id}")
         
         # Make the API request using only the key
-        response = requests.get(
-            "https://www.googleapis.com/youtube/v3/videos",
-            params=params,
-            timeout=10
-        )
-        response.raise_for_status()
-        
-        data = response.json()
+        data = _get_json("https://www.googleapis.com/youtube/v3/videos", params, timeout=10)
         
         if not data.get("items"):
             logger.warning(f"No video found with ID {video_id}")
@@ -175,36 +407,15 @@ def extract_video_statistics(video_id):
         snippet = video_data.get("snippet", {})
         statistics = video_data.get("statistics", {})
         
-        # Parse the date
-        date_str = snippet.get("publishedAt", "")
-        try:
-            date_obj = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
-            formatted_date = date_obj.strftime("%Y-%m-%d")
-        except (ValueError, AttributeError):
-            formatted_date = date_str
-        
-        # Safely parse numeric values
-        try:
-            view_count = int(statistics.get("viewCount", 0))
-        except (ValueError, TypeError):
-            view_count = 0
-            
-        try:
-            like_count = int(statistics.get("likeCount", 0))
-        except (ValueError, TypeError):
-            like_count = 0
-            
-        try:
-            comment_count = int(statistics.get("commentCount", 0))
-        except (ValueError, TypeError):
-            comment_count = 0
+        # Keep only the date part of the ISO 8601 timestamp
+        formatted_date = snippet.get("publishedAt", "")[:10]
         
         return {
             "title": snippet.get("title", "Unknown Title"),
             "channel": snippet.get("channelTitle", "Unknown Channel"),
-            "views": view_count,
-            "likes": like_count,   
-            "comments": comment_count,
+            "views": to_int(statistics.get("viewCount", 0)),
+            "likes": to_int(statistics.get("likeCount", 0)),
+            "comments": to_int(statistics.get("commentCount", 0)),
             "published_at": formatted_date,
             "description": snippet.get("description", "No description available")
         }